@@ -1,5 +1,7 @@
 # ap_units.py
 
+from functools import lru_cache
+
 AP_UNITS_DATA = {
     1: {
         "name": "Limits and Continuity",
@@ -105,4 +107,66 @@ AP_UNITS_DATA = {
             "10.6": "Taylor and Maclaurin Series"
         }
     }
-}
\ No newline at end of file
+}
+
+# --- Precomputed lookups ---
+# AP_UNITS_DATA never changes at runtime, so these are built once at import.
+
+# Skill IDs for each unit, e.g. {1: ("1.1", "1.2", ...), ...}
+SKILLS_BY_UNIT = {
+    unit_number: tuple(unit_data.get("skills", {}).keys())
+    for unit_number, unit_data in AP_UNITS_DATA.items()
+}
+
+# Skill ID sets for each unit, for fast membership checks
+SKILL_ID_SETS = {
+    unit_number: frozenset(skill_ids)
+    for unit_number, skill_ids in SKILLS_BY_UNIT.items()
+}
+
+# Reverse index from skill ID to its unit, e.g. {"1.1": 1, ...}
+UNIT_BY_SKILL_ID = {
+    skill_id: unit_number
+    for unit_number, skill_ids in SKILLS_BY_UNIT.items()
+    for skill_id in skill_ids
+}
+
+# Valid unit numbers and a display string like "1, 2, ..., 10"
+UNIT_NUMBERS = frozenset(AP_UNITS_DATA)
+UNIT_LIST_TEXT = ', '.join(map(str, AP_UNITS_DATA.keys()))
+
+def _build_skill_list_fields():
+    """Builds (field_name, field_value) pairs for the skill list embed, split to Discord's 1024-char field limit."""
+    fields = []
+    for unit_number, unit_data in AP_UNITS_DATA.items():
+        unit_name = unit_data.get("name", f"Unit {unit_number}")
+        skills = unit_data.get("skills", {})
+
+        if not skills:
+            fields.append((f"{unit_name} Skills", "No skills defined for this unit."))
+            continue
+
+        skills_text = "\n".join(f"`{skill_id}` - {skill_name}" for skill_id, skill_name in skills.items())
+        if len(skills_text) > 1024:
+            chunks = [skills_text[i:i+1024] for i in range(0, len(skills_text), 1024)]
+            for i, chunk in enumerate(chunks):
+                fields.append((f"{unit_name} Skills (Part {i+1})", chunk))
+        else:
+            fields.append((f"{unit_name} Skills", skills_text))
+    return tuple(fields)
+
+# Embed fields for the skill list command, e.g. (("Limits and Continuity Skills", "`1.1` - ..."), ...)
+SKILL_LIST_EMBED_FIELDS = _build_skill_list_fields()
+
+# Both label caches are bounded because they're also called with raw command input.
+# Each bound is large enough to hold every real unit or skill.
+
+@lru_cache(maxsize=16)
+def unit_label(unit_number):
+    """Returns the name of a unit, e.g. "Limits and Continuity". Falls back to "N/A" for unknown units."""
+    return AP_UNITS_DATA.get(unit_number, {}).get("name", "N/A")
+
+@lru_cache(maxsize=64)
+def skill_label(unit_number, skill_id):
+    """Returns the description of a skill within a unit. Falls back to "Skill <skill_id>" for unknown skills."""
+    return AP_UNITS_DATA.get(unit_number, {}).get("skills", {}).get(skill_id, f"Skill {skill_id}")
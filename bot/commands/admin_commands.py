@@ -1,12 +1,14 @@
 import discord
 from discord.ext import commands
 import logging
+import asyncio
 import random
-import json
+import time
+from collections import defaultdict
 
 import bot.database
-from bot import groq_api
-from ap_units import AP_UNITS_DATA
+from bot import config, groq_api
+from ap_units import SKILLS_BY_UNIT, UNIT_LIST_TEXT, UNIT_NUMBERS
 
 log = logging.getLogger(__name__)
 
@@ -17,20 +19,55 @@ class AdminCommands(commands.Cog):
     """
     def __init__(self, bot):
         self.bot = bot
+        self._user_name_cache = {} # Example: {user_id: (username, cached_at_monotonic)}
         log.info("AdminCommands cog loaded.")
 
-    async def cog_check(self, ctx):
+    async def _resolve_usernames(self, user_ids):
         """
-        A check that ensures only users with administrator permissions can use commands
-        within this cog.
+        Resolves a collection of user IDs to usernames.
+        Uses the bot's user cache first, then fetches the remaining users concurrently.
+        Resolved names are cached for config.USER_NAME_CACHE_TTL_SECONDS; expired entries are dropped on each call.
+        Returns a dictionary mapping user ID to username.
         """
-        if not ctx.author.guild_permissions.administrator:
-            await ctx.send("You do not have administrative permissions to use this command.")
-            log.warning(f"Unauthorized admin command attempt by {ctx.author.id} ({ctx.author.name}) in guild {ctx.guild.id}: {ctx.command.name}.")
-            return False
-        return True
+        now = time.monotonic()
+        self._user_name_cache = {
+            user_id: cached for user_id, cached in self._user_name_cache.items()
+            if now - cached[1] < config.USER_NAME_CACHE_TTL_SECONDS
+        }
+        names = {}
+        missing_ids = []
+        for user_id in set(user_ids):
+            cached = self._user_name_cache.get(user_id)
+            if cached:
+                names[user_id] = cached[0]
+                continue
+            user = self.bot.get_user(user_id)
+            if user:
+                names[user_id] = user.name
+                self._user_name_cache[user_id] = (user.name, now)
+            else:
+                missing_ids.append(user_id)
+
+        if missing_ids:
+            semaphore = asyncio.Semaphore(config.USER_FETCH_CONCURRENCY)
+
+            async def fetch_one(user_id):
+                async with semaphore:
+                    try:
+                        return await self.bot.fetch_user(user_id)
+                    except discord.HTTPException as e:
+                        log.warning(f"Could not fetch user {user_id}: {e}")
+                        return None
+
+            fetched_users = await asyncio.gather(*(fetch_one(user_id) for user_id in missing_ids))
+            for user_id, user in zip(missing_ids, fetched_users):
+                if user:
+                    names[user_id] = user.name
+                    self._user_name_cache[user_id] = (user.name, now)
+        return names
 
     @commands.command(name="populatedb", help="Populates the database with AP Calculus BC questions for a specified unit. (Admin only)")
+    @commands.has_permissions(administrator=True)
     async def populate_db(self, ctx, unit_number: int, num_questions: int):
         """
         Generates and adds a specified number of AP Calculus BC questions for a given unit
@@ -45,61 +82,103 @@ class AdminCommands(commands.Cog):
                 log.error(f"Failed to initialize Groq client for populate_db: {e}", exc_info=True)
                 return
 
-        if unit_number not in AP_UNITS_DATA:
-            await ctx.send(f"❌ Invalid unit number: {unit_number}. Please choose from {list(AP_UNITS_DATA.keys())}.")
+        if unit_number not in UNIT_NUMBERS:
+            await ctx.send(f"❌ Invalid unit number: {unit_number}. Please choose from {UNIT_LIST_TEXT}.")
             return
 
         if num_questions <= 0:
             await ctx.send("❌ Number of questions must be positive.")
             return
 
-        await ctx.send(f"⏳ Generating {num_questions} questions for Unit {unit_number}. This may take a while...")
+        progress_message = await ctx.send(f"⏳ Generating {num_questions} questions for Unit {unit_number}. This may take a while...")
         log.info(f"Admin {ctx.author.name} initiated database population for Unit {unit_number} (x{num_questions}).")
 
-        skills_in_unit = list(AP_UNITS_DATA[unit_number]['skills'].keys())
+        skills_in_unit = SKILLS_BY_UNIT[unit_number]
         if not skills_in_unit:
             await ctx.send(f"❌ No skills defined for Unit {unit_number}.")
             log.error(f"No skills found for Unit {unit_number} during populate_db.")
             return
 
-        successful_generations = 0
-        for i in range(num_questions):
-            skill_id = random.choice(skills_in_unit)
-            question_type = random.choice(["MCQ", "FRQ"])
-            difficulty = random.choice(["Easy", "Medium", "Hard"])
-            calculator_active = random.choice([True, False])
+        # Limits how many Groq requests are in flight at once to respect rate limits.
+        semaphore = asyncio.Semaphore(config.GROQ_MAX_CONCURRENT_REQUESTS)
 
-            try:
-                question_data = await groq_api.generate_question_json(
+        async def generate_one(skill_id, question_type, difficulty, calculator_active):
+            """Generates a single question. Returns the question data, or None on failure."""
+            async with semaphore:
+                return await groq_api.generate_question_json(
                     unit_number=unit_number,
                     skill_id=skill_id,
                     question_type=question_type,
                     difficulty=difficulty,
                     calculator_active=calculator_active
                 )
-                if question_data and await bot.database.add_question(question_data):
-                    successful_generations += 1
-                    await ctx.send(f"✅ Generated and added question {i+1}/{num_questions} for skill `{skill_id}`.")
-                else:
-                    await ctx.send(f"⚠️ Failed to add question {i+1}/{num_questions} (possibly a duplicate or generation error).")
+
+        # Parameters are sampled up front, one bulk draw per axis, so the coroutines only await the API.
+        question_params = zip(
+            random.choices(skills_in_unit, k=num_questions),
+            random.choices(("MCQ", "FRQ"), k=num_questions),
+            random.choices(("Easy", "Medium", "Hard"), k=num_questions),
+            random.choices((True, False), k=num_questions)
+        )
+
+        # Progress is reported by editing a single message every few completions
+        # instead of sending one message per question. Results are handled as they arrive.
+        progress_step = max(1, num_questions // 20)
+        completed_count = 0
+        generation_failures = 0
+        generated_questions = []
+        tasks = [asyncio.create_task(generate_one(*params)) for params in question_params]
+        for future in asyncio.as_completed(tasks):
+            try:
+                question_data = await future
             except Exception as e:
-                log.error(f"Error generating/adding question {i+1}/{num_questions}: {e}", exc_info=True)
-                await ctx.send(f"❌ An error occurred generating question {i+1}/{num_questions}. Check logs for details.")
-                
-        await ctx.send(f"🎉 Database population complete for Unit {unit_number}! Successfully added {successful_generations} questions.")
+                log.error(f"Error generating question for Unit {unit_number}: {e}", exc_info=True)
+                question_data = None
+
+            completed_count += 1
+            if question_data:
+                generated_questions.append(question_data)
+            else:
+                generation_failures += 1
+                # Stop spending API quota if generation is failing repeatedly (e.g. a broken prompt or outage).
+                if generation_failures >= config.POPULATE_DB_MAX_FAILURES and completed_count < num_questions:
+                    for task in tasks:
+                        task.cancel()
+                    await asyncio.gather(*tasks, return_exceptions=True)
+                    log.error(f"Cancelling populate_db for Unit {unit_number} after {generation_failures} failed generations.")
+                    await ctx.send(f"❌ Stopped early after {generation_failures} failed generations. Check logs for details.")
+                    break
+
+            if (completed_count == 1 or completed_count % progress_step == 0) and completed_count < num_questions:
+                try:
+                    await progress_message.edit(content=f"⏳ Generated {completed_count}/{num_questions} questions for Unit {unit_number}...")
+                except discord.HTTPException as e:
+                    log.warning(f"Failed to update populatedb progress message: {e}")
+
+        # All generated questions are written in one transaction rather than one commit per question.
+        successful_generations = await bot.database.add_questions_bulk(generated_questions)
+        failed_generations = num_questions - successful_generations
+
+        if failed_generations:
+            await ctx.send(f"⚠️ Failed to add {failed_generations}/{num_questions} questions (duplicates or generation errors). Check logs for details.")
+
+        await progress_message.edit(content=f"🎉 Database population complete for Unit {unit_number}! Successfully added {successful_generations} questions.")
         log.info(f"Database population for Unit {unit_number} completed. Added {successful_generations} questions.")
 
     @commands.command(name="viewreports", help="Views all active question reports. (Admin only)")
+    @commands.has_permissions(administrator=True)
     async def view_reports_command(self, ctx):
         """
         Displays a list of all active question reports submitted by users.
         Reports are grouped by question ID for clarity.
         Example: !viewreports
         """
+        # Acknowledge immediately; the report query and user lookups can take a while.
+        status_message = await ctx.send("⏳ Loading active reports...")
         reports = await bot.database.get_active_reports()
 
         if not reports:
-            await ctx.send("✅ No active question reports at this time.")
+            await status_message.edit(content="✅ No active question reports at this time.")
             log.info(f"Admin {ctx.author.name} viewed active reports - none found.")
             return
 
@@ -110,18 +189,16 @@ class AdminCommands(commands.Cog):
         )
 
         # Group reports by question_id for better readability in the embed.
-        reports_by_question = {}
+        reports_by_question = defaultdict(list)
         for report in reports:
-            q_id = report['question_id']
-            if q_id not in reports_by_question:
-                reports_by_question[q_id] = []
-            reports_by_question[q_id].append(report)
+            reports_by_question[report['question_id']].append(report)
         
+        usernames = await self._resolve_usernames(r['user_id'] for r in reports)
+
         for q_id, q_reports in reports_by_question.items():
             report_details = []
             for r in q_reports:
-                user = self.bot.get_user(r['user_id'])
-                username = user.name if user else f"User ID: {r['user_id']}"
+                username = usernames.get(r['user_id'], f"User ID: {r['user_id']}")
                 report_details.append(f"• By {username} on {r['report_date']}: {r['reason']}")
             
             value = "\n".join(report_details)
@@ -136,10 +213,11 @@ class AdminCommands(commands.Cog):
             )
 
         embed.set_footer(text="Use !clearreport <Question ID> to clear a report. Use !disablequestion <Question ID> to disable a question.")
-        await ctx.send(embed=embed)
+        await status_message.edit(content=None, embed=embed)
         log.info(f"Admin {ctx.author.name} viewed active reports.")
 
     @commands.command(name="clearreport", help="Clears reports for a specific question ID. (Admin only)")
+    @commands.has_permissions(administrator=True)
     async def clear_report_command(self, ctx, question_id: str):
         """
         Clears all active reports associated with a given question ID.
@@ -156,6 +234,7 @@ class AdminCommands(commands.Cog):
             log.info(f"Admin {ctx.author.name} tried to clear reports for {question_id}, but none were found.")
 
     @commands.command(name="disablequestion", help="Disables or enables a question by ID, preventing it from appearing in quizzes. (Admin only)")
+    @commands.has_permissions(administrator=True)
     async def disable_question_command(self, ctx, question_id: str, disable: bool = True):
         """
         Sets the active status of a question in the database. Disabled questions
@@ -163,11 +242,7 @@ class AdminCommands(commands.Cog):
         Example: !disablequestion Q123456789 true (disables)
         Example: !disablequestion Q123456789 false (enables)
         """
-        question_exists = await bot.database.get_question(question_id)
-        if not question_exists:
-            await ctx.send(f"❌ Question `{question_id}` not found in the database.")
-            return
-
+        # disable_question reports whether a row was updated, so no separate existence check is needed.
         success = await bot.database.disable_question(question_id, disable)
 
         action = "disabled" if disable else "enabled"
@@ -175,10 +250,11 @@ class AdminCommands(commands.Cog):
             await ctx.send(f"✅ Question `{question_id}` has been successfully {action}.")
             log.info(f"Admin {ctx.author.name} {action} question {question_id}.")
         else:
-            await ctx.send(f"❌ An error occurred while trying to {action} question `{question_id}`.")
-            log.error(f"Admin {ctx.author.name} failed to {action} question {question_id}.")
+            await ctx.send(f"❌ Question `{question_id}` not found in the database.")
+            log.info(f"Admin {ctx.author.name} tried to {action} question {question_id}, but it was not found.")
             
     @commands.command(name="deleteall", help="Deletes ALL questions from the database instantly. (Admin only)", hidden=True)
+    @commands.has_permissions(administrator=True)
     async def delete_all_command(self, ctx):
         """
         Deletes all questions from the database without requiring confirmation.
@@ -1,12 +1,26 @@
 import discord
 from discord.ext import commands
 import logging
+import asyncio
 
-from ap_units import AP_UNITS_DATA 
+from ap_units import SKILL_LIST_EMBED_FIELDS, skill_label, unit_label
 import bot.database
 
 log = logging.getLogger(__name__)
 
+# Template for the "Details" field of !getquestion
+_QUESTION_DETAILS_TEMPLATE = (
+    "**Unit:** {unit_number}\n"
+    "**Skill:** {skill_id}\n"
+    "**Type:** {representation_type}\n"
+    "**Difficulty:** {difficulty}\n"
+    "**Calculator Active:** {calculator_active}\n"
+    "**Disabled:** {is_disabled}"
+)
+
+# Option letter prefixes, e.g. ("A. ", "B. ", ...)
+_OPTION_PREFIXES = tuple(f"{chr(65 + i)}. " for i in range(26))
+
 class InfoCommands(commands.Cog):
     """
     A cog containing informational commands for users, such as listing AP skills
@@ -14,8 +28,21 @@ class InfoCommands(commands.Cog):
     """
     def __init__(self, bot):
         self.bot = bot
+        self._skills_embed = self._build_skills_embed()
         log.info("InfoCommands cog loaded.")
 
+    def _build_skills_embed(self):
+        """Builds the skill list embed. Its content is static, so it is built once and reused."""
+        embed = discord.Embed(
+            title="AP Calculus BC Units & Skills",
+            description="Here's a breakdown of the AP Calculus BC curriculum by Unit and Skill ID.",
+            color=discord.Color.gold()
+        )
+
+        for field_name, field_value in SKILL_LIST_EMBED_FIELDS:
+            embed.add_field(name=field_name, value=field_value, inline=False)
+        return embed
+
     @commands.command(name='listskills', aliases=['skills', 'allskills'], 
                       help='Lists all AP Units and their associated Skill IDs.')
     async def list_skills(self, ctx):
@@ -24,41 +51,7 @@ class InfoCommands(commands.Cog):
         corresponding Skill IDs and descriptions.
         """
         log.info(f"User {ctx.author.id} ({ctx.author.name}) requested skill list.")
-
-        embed = discord.Embed(
-            title="AP Calculus BC Units & Skills",
-            description="Here's a breakdown of the AP Calculus BC curriculum by Unit and Skill ID.",
-            color=discord.Color.gold()
-        )
-
-        for unit_number, unit_data in AP_UNITS_DATA.items():
-            unit_name = unit_data.get("name", f"Unit {unit_number}")
-            skills = unit_data.get("skills", {})
-            
-            if skills:
-                skill_list = [f"`{skill_id}` - {skill_name}" for skill_id, skill_name in skills.items()]
-                
-                current_skills_text = "\n".join(skill_list)
-                # Splits skills into multiple embed fields if the text exceeds Discord's limit.
-                if len(current_skills_text) > 1024:
-                    chunks = [current_skills_text[i:i+1024] for i in range(0, len(current_skills_text), 1024)]
-                    for i, chunk in enumerate(chunks):
-                        field_name = f"{unit_name} Skills (Part {i+1})"
-                        embed.add_field(name=field_name, value=chunk, inline=False)
-                else:
-                    embed.add_field(
-                        name=f"{unit_name} Skills",
-                        value=current_skills_text,
-                        inline=False
-                    )
-            else:
-                embed.add_field(
-                    name=f"{unit_name} Skills",
-                    value="No skills defined for this unit.",
-                    inline=False
-                )
-        
-        await ctx.send(embed=embed)
+        await ctx.send(embed=self._skills_embed)
 
     @commands.command(name='getquestion', aliases=['q'], help='Retrieves a specific question by its ID.')
     async def get_question_command(self, ctx, question_id: str):
@@ -68,7 +61,7 @@ class InfoCommands(commands.Cog):
         Example: !getquestion 1-1.1A-abcdef1234567890
         """
         log.info(f"User {ctx.author.id} ({ctx.author.name}) requested question {question_id}.")
-        question_data = await bot.database.get_question(question_id.strip())
+        question_data = await bot.database.get_question_cached(question_id.strip())
 
         if not question_data:
             await ctx.send(f"❌ Question with ID `{question_id}` not found.")
@@ -79,17 +72,17 @@ class InfoCommands(commands.Cog):
             description=question_data['question_text'],
             color=discord.Color.green()
         )
-        embed.add_field(name="Details", value=(
-            f"**Unit:** {question_data['unit_number']}\n"
-            f"**Skill:** {question_data['skill_id']}\n"
-            f"**Type:** {question_data['representation_type']}\n"
-            f"**Difficulty:** {question_data['difficulty']}\n"
-            f"**Calculator Active:** {'Yes' if question_data['calculator_active'] else 'No'}\n"
-            f"**Disabled:** {'Yes' if question_data['is_disabled'] else 'No'}"
+        embed.add_field(name="Details", value=_QUESTION_DETAILS_TEMPLATE.format(
+            unit_number=question_data['unit_number'],
+            skill_id=question_data['skill_id'],
+            representation_type=question_data['representation_type'],
+            difficulty=question_data['difficulty'],
+            calculator_active='Yes' if question_data['calculator_active'] else 'No',
+            is_disabled='Yes' if question_data['is_disabled'] else 'No'
         ), inline=False)
 
         if question_data['options']:
-            options_text = "\n".join([f"{chr(65 + i)}. {option}" for i, option in enumerate(question_data['options'])])
+            options_text = "\n".join(_OPTION_PREFIXES[i] + option for i, option in enumerate(question_data['options']))
             embed.add_field(name="Options", value=options_text, inline=False)
         
         # Shows answer and explanation only to administrators.
@@ -115,19 +108,18 @@ class InfoCommands(commands.Cog):
                            "Example: `!reportquestion Q123456789 The answer seems incorrect`")
             return
 
-        question_data = await bot.database.get_question(question_id.strip())
-        if not question_data:
-            await ctx.send(f"❌ Question with ID `{question_id}` not found in the database.")
-            return
-
-        await bot.database.add_user(ctx.author.id, ctx.author.name)
-
-        success = await bot.database.report_question(
+        # Registers the user and records the report in one transaction; also reports whether the question exists.
+        success = await bot.database.report_question_atomic(
             question_id=question_id.strip(),
             user_id=ctx.author.id,
+            username=ctx.author.name,
             reason=reason.strip()
         )
 
+        if success is False:
+            await ctx.send(f"❌ Question with ID `{question_id}` not found in the database.")
+            return
+
         if success:
             await ctx.send(f"✅ Question `{question_id}` has been reported for review. "
                            "Thank you for helping improve the question bank!")
@@ -137,6 +129,7 @@ class InfoCommands(commands.Cog):
             log.error(f"Failed to report question {question_id} by user {ctx.author.id}")
 
     @commands.command(name='questionoverview', aliases=['qlist', 'recentq'], help='Displays an overview of recently added questions. (Admin only)')
+    @commands.has_permissions(administrator=True)
     async def question_overview_command(self, ctx, limit: int = 10, unit_number: int = None, skill_id: str = None):
         """
         Provides administrators with a paginated overview of recently added questions,
@@ -147,25 +140,25 @@ class InfoCommands(commands.Cog):
         !questionoverview 10 1 (shows 10 most recent from Unit 1)
         !questionoverview 5 1 1.1A (shows 5 most recent from Unit 1, Skill 1.1A)
         """
-        if not ctx.author.guild_permissions.administrator:
-            await ctx.send("You do not have administrative permissions to use this command.")
-            log.warning(f"Unauthorized `questionoverview` attempt by {ctx.author.id} ({ctx.author.name}) in guild {ctx.guild.id}.")
-            return
-        
         log.info(f"User {ctx.author.id} ({ctx.author.name}) requested question overview for Unit: {unit_number}, Skill: {skill_id}.")
 
-        questions = await bot.database.get_recent_questions_overview(limit=limit, unit_number=unit_number, skill_id=skill_id)
-        total_questions_count = await bot.database.get_total_question_count()
+        # Acknowledge immediately; the overview queries run after the user sees a response.
+        status_message = await ctx.send("⏳ Loading question overview...")
+        questions, total_questions_count = await asyncio.gather(
+            bot.database.get_recent_questions_overview(limit=limit, unit_number=unit_number, skill_id=skill_id),
+            bot.database.get_total_question_count()
+        )
 
         if not questions:
-            await ctx.send(f"No questions found matching the criteria (Limit: {limit}, Unit: {unit_number if unit_number else 'Any'}, Skill: {skill_id if skill_id else 'Any'}).")
+            await status_message.edit(content=f"No questions found matching the criteria (Limit: {limit}, Unit: {unit_number if unit_number else 'Any'}, Skill: {skill_id if skill_id else 'Any'}).")
             return
         
+        # Rows keep the compact U/S codes so more of each snippet fits in a field; the filter is named in full here.
         title_suffix = ""
         if unit_number:
-            title_suffix += f" (Unit {unit_number}"
+            title_suffix += f" (Unit {unit_number}: {unit_label(unit_number)}"
             if skill_id:
-                title_suffix += f", Skill {skill_id}"
+                title_suffix += f", Skill {skill_id}: {skill_label(unit_number, skill_id)}"
             title_suffix += ")"
         elif skill_id:
             title_suffix += f" (Skill {skill_id})"
@@ -176,22 +169,27 @@ class InfoCommands(commands.Cog):
             color=discord.Color.blue()
         )
 
-        questions_text = ""
+        # Entries are collected per field and joined once, tracking the field length as we go.
+        batch = []
+        batch_len = 0
         for i, q in enumerate(questions):
             entry = f"{i+1}. `{q['question_id']}` (U{q['unit_number']}/S{q['skill_id']}): {q['question_text_snippet']}\n"
+            entry_len = len(entry)
             
             # Ensures embed field value does not exceed Discord's limit.
-            if len(questions_text) + len(entry) > 1024:
-                embed.add_field(name="Questions (cont.)", value=questions_text, inline=False)
-                questions_text = entry
+            if batch_len + entry_len > 1024:
+                embed.add_field(name="Questions (cont.)", value="".join(batch), inline=False)
+                batch = [entry]
+                batch_len = entry_len
             else:
-                questions_text += entry
+                batch.append(entry)
+                batch_len += entry_len
         
-        if questions_text:
-            embed.add_field(name="Questions", value=questions_text, inline=False)
+        if batch:
+            embed.add_field(name="Questions", value="".join(batch), inline=False)
         
         embed.set_footer(text=f"Use !getquestion <ID> for full details. Total questions in DB: {total_questions_count}.")
-        await ctx.send(embed=embed)
+        await status_message.edit(content=None, embed=embed)
 
 
 async def setup(bot):
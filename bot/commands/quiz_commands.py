@@ -2,164 +2,245 @@ import discord
 from discord.ext import commands
 import logging
 import asyncio
-import random
-import json
-import time
+import re
+from functools import lru_cache
 
 import bot.database
 from bot import config
-from ap_units import AP_UNITS_DATA
+from ap_units import UNIT_BY_SKILL_ID, UNIT_LIST_TEXT, UNIT_NUMBERS, skill_label
 from bot import quiz_sessions
-from bot import groq_api
 
 log = logging.getLogger(__name__)
 
+# Question embed footers; identical for every question, so built once.
+_FOOTER_WITH_OPTIONS = ("Type your answer (e.g., A, B, C, D) using `!answer <your_choice>`\n"
+                        "Report a question anytime: `!reportquestion <question_id> <reason>`")
+_FOOTER_NO_OPTIONS = ("Type your answer using `!answer <your_answer>`\n"
+                      "Report a question anytime: `!reportquestion <question_id> <reason>`")
+
+# Matches a quiz unit parameter: a single unit ("3") or a range ("1-3"), ignoring surrounding spaces
+_UNITS_PARAM_RE = re.compile(r'^\s*(\d+)(?:\s*-\s*(\d+))?\s*$')
+# Lowest and highest unit numbers, for bounding unit ranges
+_MIN_UNIT = min(UNIT_NUMBERS)
+_MAX_UNIT = max(UNIT_NUMBERS)
+
+# Formats the "Details" field: unit, skill, difficulty, type, calculator
+_format_details = "Unit: {} | Skill: `{}`\nDifficulty: {} | Type: {}\nCalculator: {}".format
+
+# Formats the explanation shown after an answer: correct answer, explanation
+_format_explanation = "The correct answer was: ||{}||\n\nExplanation: {}".format
+
+# Embed colours for questions and answer feedback
+_COLOR_QUESTION = discord.Color.blue()
+_COLOR_CORRECT = discord.Color.green()
+_COLOR_INCORRECT = discord.Color.red()
+
+# Discord rejects a message whose embeds add up to more characters than this
+_MAX_EMBED_CHARS_PER_MESSAGE = 6000
+
+# Option letters, indexed by option position
+_LETTERS_UPPER = tuple("ABCDEFGHIJKLMNOPQRSTUVWXYZ")
+
+@lru_cache(maxsize=512)
 def chunk_text(text, max_len=1024):
-    """Breaks a long string into a list of strings, each no longer than max_len."""
+    """
+    Breaks a long string into a tuple of strings, each no longer than max_len.
+    Results are cached, since the same explanations are chunked every time a question is answered.
+    """
     if len(text) <= max_len:
-        return [text]
+        return (text,)
     
+    # Walks the string once, cutting at the last space or newline that fits in each chunk.
     chunks = []
-    current_chunk = ""
-    words = text.split(' ')
+    start = 0
+    text_len = len(text)
+    while start < text_len:
+        end = start + max_len
+        if end >= text_len:
+            chunk = text[start:].strip()
+            if chunk:
+                chunks.append(chunk)
+            break
+
+        break_at = max(text.rfind(' ', start, end + 1), text.rfind('\n', start, end + 1))
+        if break_at <= start:
+            # No whitespace to break on; hard-split the word.
+            break_at = end
+            next_start = end
+        else:
+            next_start = break_at + 1
+
+        chunk = text[start:break_at].strip()
+        if chunk:
+            chunks.append(chunk)
+        start = next_start
+    return tuple(chunks)
+
+def build_question_embed(question_data, options_map):
+    """Builds the embed for a quiz question, given its precomputed options map."""
+    embed = discord.Embed(
+        title=f"Question (ID: {question_data['question_id']})",
+        description=question_data['question_text'],
+        color=_COLOR_QUESTION
+    )
 
-    for word in words:
-        if len(current_chunk) + len(word) + 1 <= max_len:
-            current_chunk += (word + ' ')
+    if question_data['representation_type'] == 'MCQ' and question_data.get('options'):
+        if options_map:
+            options_text = "\n".join(f"**{letter.upper()}**. {option_text}" for letter, option_text in options_map.items())
+            embed.add_field(name="Options", value=options_text, inline=False)
+            embed.set_footer(text=_FOOTER_WITH_OPTIONS)
         else:
-            chunks.append(current_chunk.strip())
-            current_chunk = (word + ' ')
-    if current_chunk.strip():
-        chunks.append(current_chunk.strip())
-    return chunks
+            embed.add_field(name="Options", value="Error loading options.", inline=False)
+            embed.set_footer(text=_FOOTER_NO_OPTIONS)
+    else:
+        embed.set_footer(text=_FOOTER_NO_OPTIONS)
+
+    embed.add_field(name="Details", value=_format_details(
+        question_data['unit_number'],
+        question_data['skill_id'],
+        question_data['difficulty'],
+        question_data['representation_type'],
+        'Yes' if question_data['calculator_active'] else 'No'
+    ), inline=False)
+
+    return embed
+
+def prepare_quiz_question(question_data):
+    """
+    Precomputes the option letter map, correct answer and question embed once, when the quiz is built,
+    so asking the question only needs to read them. Results are stored on the question dict under
+    '_options_map', '_text_to_letter', '_correct_letter', '_correct_answer_text' and '_embed'.
+    """
+    options_map = None
+    text_to_letter = None
+    correct_letter_found = None
+    correct_option_text_found = None
+
+    raw_options = question_data.get('options')
+    # Only MCQs use options; FRQs skip option processing entirely.
+    if question_data['representation_type'] == 'MCQ' and raw_options and isinstance(raw_options, list):
+        options = list(raw_options) # No random.shuffle(options) here to prevent shuffling
+        options_map = {}
+        text_to_letter = {}
+        for i, option_text in enumerate(options):
+            letter = _LETTERS_UPPER[i]
+            options_map[letter] = option_text
+            # Reverse lookup so answers typed as option text resolve in one dict lookup
+            text_to_letter.setdefault(option_text.strip().lower(), letter)
+
+        db_correct_val = str(question_data['correct_answer']).strip().lower()
+
+        # First, try to match by letter (e.g., 'A', 'B') if db_correct_val is a single letter
+        if len(db_correct_val) == 1 and db_correct_val.isalpha():
+            original_correct_index = ord(db_correct_val) - ord('a')
+            if 0 <= original_correct_index < len(raw_options):
+                correct_option_text_found = raw_options[original_correct_index].strip().lower()
+                correct_letter_found = _LETTERS_UPPER[original_correct_index]
+
+        # If not matched by letter, or if db_correct_val is the text itself, try to match by text
+        if correct_option_text_found is None and db_correct_val in text_to_letter:
+            correct_option_text_found = db_correct_val
+            correct_letter_found = text_to_letter[db_correct_val]
+        
+        # If still not found, fallback to original correct_answer for text, and no letter
+        if correct_option_text_found is None:
+            correct_option_text_found = db_correct_val # Fallback, might be a free response or unmatchable MCQ
+
+    else: # Not MCQ or no options
+        options_map = None
+        text_to_letter = None
+        correct_letter_found = None
+        correct_option_text_found = str(question_data['correct_answer']).strip().lower()
+
+    question_data['_options_map'] = options_map
+    question_data['_text_to_letter'] = text_to_letter
+    question_data['_correct_letter'] = correct_letter_found
+    question_data['_correct_answer_text'] = correct_option_text_found
+    question_data['_embed'] = build_question_embed(question_data, options_map)
+    return question_data
+
+def prepare_quiz_questions(questions):
+    """
+    Validates and prepares all questions for a quiz in a single pass when the quiz starts.
+    MCQs without a usable list of options are dropped (and logged once here) rather than
+    failing when they are asked. Returns the list of prepared questions.
+    """
+    prepared_questions = []
+    for question_data in questions:
+        raw_options = question_data.get('options')
+        if question_data['representation_type'] == 'MCQ' and not (raw_options and isinstance(raw_options, list)):
+            log.warning(f"Skipping MCQ {question_data['question_id']} with malformed options: {raw_options!r}")
+            continue
+        if raw_options and len(raw_options) > len(_LETTERS_UPPER):
+            log.warning(f"Skipping question {question_data['question_id']} with {len(raw_options)} options; at most {len(_LETTERS_UPPER)} are supported.")
+            continue
+        prepared_questions.append(prepare_quiz_question(question_data))
+    return prepared_questions
 
 class QuizCommands(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         log.info("QuizCommands cog loaded.")
 
-    async def _send_question(self, channel, quiz_session: quiz_sessions.QuizSession):
-        """Sends a formatted question from the current quiz session to the specified channel."""
-        question_data = quiz_session.current_question_data
-        if not question_data:
-            log.error(f"Failed to send question for channel {channel.id}: no current_question_data.")
-            await channel.send("An internal error occurred. The quiz has been stopped.")
-            quiz_sessions.clear_quiz_session(channel.id)
-            return
-
-        embed = discord.Embed(
-            title=f"Question (ID: {question_data['question_id']})",
-            description=question_data['question_text'],
-            color=discord.Color.blue()
+    def _advance_question(self, session: quiz_sessions.QuizSession):
+        """
+        Moves the session on to its next question and returns that question's prebuilt embed.
+        Returns None if the quiz has run out of questions.
+        """
+        current_question_index = session.questions_asked_count
+        if current_question_index >= len(session.all_quiz_questions):
+            return None
+
+        question_data = session.all_quiz_questions[current_question_index]
+
+        # Options, the correct answer and the embed were precomputed when the quiz was built (see prepare_quiz_question).
+        session.set_current_question(
+            question_data,
+            question_data['_options_map'],
+            question_data['_correct_letter'],
+            question_data['_text_to_letter'],
+            question_data['_correct_answer_text']
         )
-
-        options_text = ""
-        options_map = quiz_session.current_options_map
-
-        if question_data.get('options'):
-            if options_map:
-                for letter, option_text in options_map.items():
-                    options_text += f"**{letter.upper()}**. {option_text}\n"
-                embed.add_field(name="Options", value=options_text, inline=False)
-                embed.set_footer(text=f"Type your answer (e.g., A, B, C, D) using `!answer <your_choice>`\n"
-                                       f"Report a question anytime: `!reportquestion <question_id> <reason>`")
-            else:
-                embed.add_field(name="Options", value="Error loading options.", inline=False)
-                embed.set_footer(text=f"Type your answer using `!answer <your_answer>`\n"
-                                       f"Report a question anytime: `!reportquestion <question_id> <reason>`")
-        else:
-            embed.set_footer(text=f"Type your answer using `!answer <your_answer>`\n"
-                                   f"Report a question anytime: `!reportquestion <question_id> <reason>`")
-
-        embed.add_field(name="Details", value=(
-            f"Unit: {question_data['unit_number']} | Skill: `{question_data['skill_id']}`\n"
-            f"Difficulty: {question_data['difficulty']} | Type: {question_data['representation_type']}\n"
-            f"Calculator: {'Yes' if question_data['calculator_active'] else 'No'}"
-        ), inline=False)
-
-        quiz_sessions.set_quiz_session(channel.id, quiz_session)
-
-        await channel.send(embed=embed)
-        log.info(f"Question {question_data['question_id']} sent to channel {channel.id}.")
-
-    async def _ask_next_question(self, channel):
-        """Fetches, sets, and sends the next question in the quiz session."""
-        session = quiz_sessions.get_quiz_session(channel.id)
-        if not session:
-            log.warning(f"No active quiz session for channel {channel.id} when asking next question.")
-            return
-
-        if session.is_complete():
-            await self._end_quiz(channel)
-            return
+        session.questions_asked_count += 1
+        return question_data['_embed']
+
+    async def _ask_next_question(self, channel, session=None):
+        """
+        Fetches, sets, and sends the next question in the quiz session.
+        Callers that already hold the session pass it in, and are expected to have
+        ended the quiz themselves if it is complete.
+        """
+        if session is None:
+            session = quiz_sessions.get_quiz_session(channel.id)
+            if not session:
+                log.warning(f"No active quiz session for channel {channel.id} when asking next question.")
+                return
 
         try:
-            current_question_index = session.questions_asked_count
-            if current_question_index >= len(session.all_quiz_questions):
+            embed = self._advance_question(session)
+            if embed is None:
                 log.warning(f"No more questions in quiz list for channel {channel.id}. Ending quiz.")
                 await self._end_quiz(channel)
                 return
 
-            question_data = session.all_quiz_questions[current_question_index]
-
-            options_map = None
-            correct_letter_found = None
-            correct_option_text_found = None
-
-            raw_options = question_data.get('options')
-            if raw_options and isinstance(raw_options, list):
-                options = list(raw_options) # No random.shuffle(options) here to prevent shuffling
-                options_map = {}
-                db_correct_val = str(question_data['correct_answer']).strip().lower()
-
-                # First, try to match by letter (e.g., 'A', 'B') if db_correct_val is a single letter
-                if len(db_correct_val) == 1 and db_correct_val.isalpha():
-                    original_correct_index = ord(db_correct_val) - ord('a')
-                    if 0 <= original_correct_index < len(raw_options):
-                        correct_option_text_found = raw_options[original_correct_index].strip().lower()
-                        correct_letter_found = chr(65 + original_correct_index)
-
-                # If not matched by letter, or if db_correct_val is the text itself, try to match by text
-                if correct_option_text_found is None:
-                    for i, option_text in enumerate(options): # Use the ordered 'options'
-                        if option_text.strip().lower() == db_correct_val:
-                            correct_option_text_found = option_text.strip().lower()
-                            correct_letter_found = chr(65 + i) # Get the letter for this matching text
-                            break
-                
-                # If still not found, fallback to original correct_answer for text, and no letter
-                if correct_option_text_found is None:
-                    correct_option_text_found = db_correct_val # Fallback, might be a free response or unmatchable MCQ
-
-                for i, option_text in enumerate(options):
-                    letter = chr(65 + i)
-                    options_map[letter] = option_text
-                
-            else: # Not MCQ or no options
-                options_map = None
-                correct_letter_found = None
-                correct_option_text_found = str(question_data['correct_answer']).strip().lower()
-
-            session.set_current_question(question_data, options_map, correct_letter_found)
-            session.correct_answer_text = correct_option_text_found # Store the actual option text
-            session.questions_asked_count += 1
-
-            await self._send_question(channel, session)
+            await channel.send(embed=embed)
+            log.info(f"Question {session.current_question_data['question_id']} sent to channel {channel.id}.")
             
         except Exception as e:
             log.error(f"Error asking next question for channel {channel.id}: {e}", exc_info=True)
             await channel.send("An error occurred while preparing the next question. The quiz has ended.")
-            quiz_sessions.clear_quiz_session(channel.id)
+            quiz_sessions.pop_quiz_session(channel.id)
+            await bot.database.record_answers_bulk(session.take_pending_answers())
 
     async def _end_quiz(self, channel):
         """Ends the quiz session and provides a summary."""
-        session = quiz_sessions.get_quiz_session(channel.id)
+        session = quiz_sessions.pop_quiz_session(channel.id)
         if session:
+            await bot.database.record_answers_bulk(session.take_pending_answers())
             await channel.send(
                 f"🎉 Quiz complete! You answered {session.correct_answers_count} out of {session.questions_asked_count} questions correctly."
             )
             log.info(f"Quiz ended in channel {channel.id} for user {session.user_id}. Score: {session.correct_answers_count}/{session.questions_asked_count}")
-            quiz_sessions.clear_quiz_session(channel.id)
         else:
             await channel.send("The quiz has ended (no active session found to summarize).")
             log.info(f"Attempted to end quiz in channel {channel.id} but no session found.")
@@ -184,39 +265,40 @@ class QuizCommands(commands.Cog):
             await ctx.send(f"Please limit the number of questions to {config.MAX_QUIZ_QUESTIONS} or fewer.")
             num_questions = config.MAX_QUIZ_QUESTIONS
 
-        selected_unit_numbers = []
-        if '-' in units_param:
-            try:
-                start_unit, end_unit = map(int, units_param.split('-'))
-                if not (1 <= start_unit <= len(AP_UNITS_DATA) and 1 <= end_unit <= len(AP_UNITS_DATA) and start_unit <= end_unit):
-                    await ctx.send(f"Invalid unit range. Units must be between 1 and {len(AP_UNITS_DATA)}, and the start unit must be less than or equal to the end unit.")
-                    return
-                selected_unit_numbers = list(range(start_unit, end_unit + 1))
-            except ValueError:
-                await ctx.send("Invalid unit range format. Please use `start_unit-end_unit` (e.g., `1-3`).")
+        units_match = _UNITS_PARAM_RE.match(units_param)
+        if not units_match:
+            await ctx.send("Invalid unit format. Please provide a single unit number (e.g., `1`) or a range (e.g., `1-3`).")
+            return
+
+        is_unit_range = units_match.group(2) is not None
+        if is_unit_range:
+            start_unit, end_unit = int(units_match.group(1)), int(units_match.group(2))
+            # Bounds are checked before the range is built, so a huge range can't allocate a huge list.
+            # Membership is checked too, so a gap in the unit numbering cannot slip through.
+            if (start_unit > end_unit or start_unit < _MIN_UNIT or end_unit > _MAX_UNIT
+                    or not all(unit in UNIT_NUMBERS for unit in range(start_unit, end_unit + 1))):
+                await ctx.send(f"Invalid unit range. Available units: {UNIT_LIST_TEXT}, and the start unit must be less than or equal to the end unit.")
                 return
+            selected_unit_numbers = list(range(start_unit, end_unit + 1))
         else:
-            try:
-                single_unit = int(units_param)
-                if single_unit not in AP_UNITS_DATA:
-                    await ctx.send(f"Unit {single_unit} not found. Available units: {', '.join(map(str, AP_UNITS_DATA.keys()))}. Please pick a valid unit or range.")
-                    return
-                selected_unit_numbers = [single_unit]
-            except ValueError:
-                await ctx.send("Invalid unit number format. Please provide a single unit number (e.g., `1`) or a range (e.g., `1-3`).")
+            single_unit = int(units_match.group(1))
+            if single_unit not in UNIT_NUMBERS:
+                await ctx.send(f"Unit {single_unit} not found. Available units: {UNIT_LIST_TEXT}. Please pick a valid unit or range.")
                 return
+            selected_unit_numbers = [single_unit]
 
         await bot.database.add_user(ctx.author.id, ctx.author.name)
-        all_available_questions = await bot.database.get_questions_by_unit_list(selected_unit_numbers)
+        # Questions are sampled from cached per-unit or per-skill pools, so repeated quizzes do not query the database.
+        questions_for_quiz = prepare_quiz_questions(
+            await bot.database.get_random_questions_by_unit_list(selected_unit_numbers, num_questions)
+        )
 
-        if not all_available_questions:
-            unit_display = units_param if '-' not in units_param else f"Units {units_param}"
+        if not questions_for_quiz:
+            unit_display = f"Units {units_param}" if is_unit_range else units_param
             await ctx.send(f"Sorry, I couldn't find any questions for {unit_display}. Please ask an admin to generate questions for these units.")
             log.warning(f"No questions found for {unit_display} in channel {ctx.channel.id}.")
             return
         
-        questions_for_quiz = random.sample(all_available_questions, min(num_questions, len(all_available_questions)))
-        
         if len(questions_for_quiz) < num_questions:
             await ctx.send(f"I could only find {len(questions_for_quiz)} questions for {units_param}. Starting a quiz with these questions.")
             log.warning(f"Requested {num_questions} questions for {units_param}, but only found {len(questions_for_quiz)}.")
@@ -232,8 +314,9 @@ class QuizCommands(commands.Cog):
             num_questions=len(questions_for_quiz),
             all_quiz_questions=questions_for_quiz
         )
+        session.author_avatar_url = ctx.author.avatar.url if ctx.author.avatar else None
         quiz_sessions.set_quiz_session(ctx.channel.id, session)
-        await self._ask_next_question(ctx.channel)
+        await self._ask_next_question(ctx.channel, session)
 
     @commands.command(name='skillquiz', help='Starts a quiz with N questions from a specific Skill ID. Usage: `!skillquiz <skill_id> [num_questions]`\nExample: `!skillquiz 1.3 5` (Starts a 5-question quiz on Skill 1.3)')
     async def skill_quiz(self, ctx, skill_id: str, num_questions: int = config.DEFAULT_QUIZ_QUESTION_COUNT):
@@ -246,30 +329,26 @@ class QuizCommands(commands.Cog):
             await ctx.send(f"You can request a maximum of {config.MAX_QUIZ_QUESTIONS} questions per quiz.")
             num_questions = config.MAX_QUIZ_QUESTIONS
 
-        try:
-            unit_number = int(skill_id.split('.')[0])
-        except (ValueError, IndexError):
-            await ctx.send(f"Invalid `skill_id` format: `{skill_id}`. Expected format like `U.S` (e.g., `1.3`).")
-            return
-
-        if unit_number not in AP_UNITS_DATA or skill_id not in AP_UNITS_DATA[unit_number]['skills']:
+        # The skill's unit comes from the precomputed index, which also validates the skill ID.
+        unit_number = UNIT_BY_SKILL_ID.get(skill_id)
+        if unit_number is None:
             await ctx.send(f"Invalid Unit Number or Skill ID. Use `{self.bot.command_prefix}listskills` to see available skills.")
             return
 
-        await ctx.send(f"Starting a {num_questions}-question quiz on Skill {skill_id}: {AP_UNITS_DATA[unit_number]['skills'][skill_id]}.")
+        await ctx.send(f"Starting a {num_questions}-question quiz on Skill {skill_id}: {skill_label(unit_number, skill_id)}.")
         log.info(f"User {ctx.author.id} starting a {num_questions}-question quiz on Skill {skill_id} in channel {ctx.channel.id}.")
         
         try:
-            all_skill_questions = await self.bot.database.get_questions_by_skill(unit_number, skill_id)
-            if not all_skill_questions:
+            # Questions are sampled from cached per-unit or per-skill pools, so repeated quizzes do not query the database.
+            selected_questions = prepare_quiz_questions(
+                await self.bot.database.get_random_questions_by_skill(unit_number, skill_id, num_questions)
+            )
+            if not selected_questions:
                 await ctx.send(f"Sorry, no questions found for Skill {skill_id} in Unit {unit_number}.")
                 log.warning(f"No questions found in DB for Skill {skill_id}, Unit {unit_number}.")
                 return
 
-            if len(all_skill_questions) > num_questions:
-                selected_questions = random.sample(all_skill_questions, num_questions)
-            else:
-                selected_questions = all_skill_questions
+            if len(selected_questions) < num_questions:
                 await ctx.send(f"Note: Only {len(selected_questions)} questions available for this skill. Starting quiz with all of them.")
 
             session = quiz_sessions.QuizSession(
@@ -280,8 +359,9 @@ class QuizCommands(commands.Cog):
                 num_questions=len(selected_questions),
                 all_quiz_questions=selected_questions
             )
+            session.author_avatar_url = ctx.author.avatar.url if ctx.author.avatar else None
             quiz_sessions.set_quiz_session(ctx.channel.id, session)
-            await self._ask_next_question(ctx.channel)
+            await self._ask_next_question(ctx.channel, session)
         except Exception as e:
             log.error(f"Error starting skill quiz: {e}", exc_info=True)
             await ctx.send("An error occurred while trying to start the skill quiz. Please try again later.")
@@ -293,61 +373,86 @@ class QuizCommands(commands.Cog):
             await ctx.send("Please provide an answer. Usage: `!answer <your_answer>`")
             return
 
+        # Answers in the same channel are handled one at a time, so two quick answers
+        # cannot both grade the same question and advance the quiz twice.
+        async with quiz_sessions.get_channel_lock(ctx.channel.id):
+            await self._process_answer(ctx, " ".join(user_answer_parts).strip())
+
+    async def _process_answer(self, ctx, user_answer):
+        """Grades an answer to the current question and moves the quiz on. Called with the channel's lock held."""
         session = quiz_sessions.get_quiz_session(ctx.channel.id)
         if not session or not session.current_question_data:
             await ctx.send("There is no active quiz question to answer in this channel. Start a quiz with `!quiz` or `!skillquiz`.")
             return
 
-        user_answer = " ".join(user_answer_parts).strip()
         channel_id = ctx.channel.id
         current_q_data = session.current_question_data
         is_correct = False
+        is_graded = True # False when FRQ grading timed out; such answers are kept out of the stats
         ai_raw_feedback = ""
 
-        session.last_activity_time = time.time()
-        quiz_sessions.set_quiz_session(channel_id, session)
-
         # MCQ answer normalization and checking (robust to option shuffling, now removed)
         if current_q_data['representation_type'] == 'MCQ':
             options_map = session.current_options_map or {}
-            correct_answer_text_from_session = (getattr(session, 'correct_answer_text', None) or '').strip().lower()
+            # Already stripped and lowercased when the quiz was prepared
+            correct_answer_text_from_session = session.correct_answer_text or ''
 
-            normalized_user_answer = user_answer.strip().upper().replace('.', '')
-            user_answer_text = ""
-            
-            # If user entered a letter, map to option text
-            if normalized_user_answer in options_map:
-                user_answer_text = options_map[normalized_user_answer].strip().lower()
+            normalized_user_answer = user_answer.upper().replace('.', '')
+
+            if session.correct_letter and normalized_user_answer in options_map:
+                # Fast path: the user typed an option letter (the common case), so compare letters directly
+                answer_matches = normalized_user_answer == session.correct_letter
             else:
-                # Try to match answer text directly (case-insensitive)
-                user_answer_text = user_answer.strip().lower()
+                # Resolve the user's choice to a letter: either they typed the letter, or the option text
+                user_answer_lower = user_answer.lower()
+                if normalized_user_answer in options_map:
+                    user_letter = normalized_user_answer
+                else:
+                    user_letter = (session.current_text_to_letter or {}).get(user_answer_lower)
+
+                if user_letter and session.correct_letter:
+                    answer_matches = user_letter == session.correct_letter
+                else:
+                    # No letter to compare; match the answer text directly (case-insensitive)
+                    user_answer_text = options_map[user_letter].strip().lower() if user_letter else user_answer_lower
+                    answer_matches = user_answer_text == correct_answer_text_from_session
 
-            # Compare answer texts
-            if user_answer_text == correct_answer_text_from_session:
+            if answer_matches:
                 is_correct = True
                 ai_raw_feedback = "Correct! Your multiple-choice answer is spot on."
             else:
                 is_correct = False
+                # Built once; the explanation below shows the same string.
                 if session.correct_letter and session.correct_letter in options_map:
-                    ai_raw_feedback = f"Incorrect. The correct answer was: {session.correct_letter}. {options_map[session.correct_letter]}"
+                    correct_answer_display = f"{session.correct_letter}. {options_map[session.correct_letter]}"
                 else:
-                    ai_raw_feedback = f"Incorrect. The correct answer was: {correct_answer_text_from_session.upper()}"
+                    correct_answer_display = correct_answer_text_from_session.upper()
+                ai_raw_feedback = f"Incorrect. The correct answer was: {correct_answer_display}"
 
         elif current_q_data['representation_type'] == 'FRQ':
-            await ctx.send("Evaluating your free-response answer, please wait...")
+            # Imported on first use; only FRQ grading needs the Groq client.
+            from bot import groq_api
             try:
-                grading_result = await groq_api.grade_free_response_answer(
-                    question_text=current_q_data['question_text'],
-                    correct_answer=current_q_data['correct_answer'],
-                    user_answer=user_answer,
-                    explanation=current_q_data['explanation']
-                )
+                # A typing indicator shows grading is in progress without sending an extra message.
+                # Grading is bounded in groq_api so a slow API call cannot hold up the quiz in this channel.
+                async with ctx.typing():
+                    grading_result = await groq_api.grade_free_response_answer(
+                        question_text=current_q_data['question_text'],
+                        correct_answer=current_q_data['correct_answer'],
+                        user_answer=user_answer,
+                        explanation=current_q_data['explanation']
+                    )
                 
                 ai_raw_feedback = grading_result.get('feedback', 'AI grading failed to provide feedback.')
                 
-                if ai_raw_feedback.lower().startswith("correct!"):
+                # Only the prefix decides the verdict, so lowercase just that slice.
+                feedback_prefix = ai_raw_feedback[:10].lower()
+                if grading_result.get('timed_out'):
+                    is_graded = False
+                    ai_raw_feedback = "Grading took too long, so your answer could not be checked and won't count toward your stats. Compare it with the explanation below."
+                elif feedback_prefix.startswith("correct!"):
                     is_correct = True
-                elif ai_raw_feedback.lower().startswith("incorrect."):
+                elif feedback_prefix.startswith("incorrect."):
                     is_correct = False
                 else:
                     log.warning(f"AI feedback for FRQ did not start with 'Correct!' or 'Incorrect.': {ai_raw_feedback}")
@@ -359,18 +464,16 @@ class QuizCommands(commands.Cog):
                 await ctx.send("An error occurred while evaluating your answer. Please try again.")
                 return
 
-        await bot.database.record_answer(
-            user_id=ctx.author.id,
-            question_id=current_q_data['question_id'],
-            is_correct=is_correct,
-            user_answer=user_answer
-        )
-
         feedback_embed = discord.Embed(
             title=f"Question {current_q_data['question_id']} - Result",
-            color=discord.Color.green() if is_correct else discord.Color.red()
+            color=_COLOR_CORRECT if is_correct else _COLOR_INCORRECT
         )
-        feedback_embed.set_author(name=ctx.author.display_name, icon_url=ctx.author.avatar.url if ctx.author.avatar else discord.Embed.Empty)
+        # The quiz starter's avatar URL is cached on the session; other answerers are looked up directly.
+        if ctx.author.id == session.user_id:
+            avatar_url = session.author_avatar_url
+        else:
+            avatar_url = ctx.author.avatar.url if ctx.author.avatar else None
+        feedback_embed.set_author(name=ctx.author.display_name, icon_url=avatar_url)
 
         ai_feedback_chunks = chunk_text(ai_raw_feedback)
         for i, chunk in enumerate(ai_feedback_chunks):
@@ -381,38 +484,72 @@ class QuizCommands(commands.Cog):
 
         if is_correct:
             session.correct_answers_count += 1
-        else:
+        elif is_graded:
             session.incorrect_answers_count += 1
 
         if not is_correct or current_q_data['representation_type'] == 'FRQ': 
             full_explanation_text = ""
             if current_q_data['representation_type'] == 'MCQ':
-                correct_answer_display = correct_answer_text_from_session.upper()
-                if session.correct_letter and session.correct_letter in options_map:
-                    correct_answer_display = f"{session.correct_letter}. {options_map.get(session.correct_letter)}"
-
-                full_explanation_text = f"The correct answer was: ||{correct_answer_display}||\n\nExplanation: {current_q_data['explanation']}"
+                full_explanation_text = _format_explanation(correct_answer_display, current_q_data['explanation'])
             else:
-                full_explanation_text = f"The correct answer was: ||{current_q_data['correct_answer']}||\n\nExplanation: {current_q_data['explanation']}"
+                full_explanation_text = _format_explanation(current_q_data['correct_answer'], current_q_data['explanation'])
 
             explanation_chunks = chunk_text(full_explanation_text)
             for i, chunk in enumerate(explanation_chunks):
                 feedback_embed.add_field(name=f"Detailed Explanation{' (cont.)' if i > 0 else ''}", value=chunk, inline=False)
 
-        await ctx.send(embed=feedback_embed)
-
         log.info(f"User {ctx.author.id} answered question {current_q_data['question_id']}. Correct: {is_correct}. "
                  f"Asked: {session.questions_asked_count}/{session.num_questions}. "
                  f"Correct count: {session.correct_answers_count}")
 
-        quiz_sessions.set_quiz_session(channel_id, session)
+        # The quiz may have been stopped or timed out while an FRQ answer was being graded. Its buffered
+        # answers were written then, so this answer is written on its own and the quiz is not moved on.
+        session_ended = quiz_sessions.get_quiz_session(channel_id) is not session
 
-        if session.is_complete():
-            await asyncio.sleep(1)
+        next_question_embed = None
+        if not session_ended and not session.is_complete():
+            try:
+                next_question_embed = self._advance_question(session)
+            except Exception as e:
+                log.error(f"Error preparing next question for channel {channel_id}: {e}", exc_info=True)
+
+        # The next question goes out in the same message as the feedback, so each answer costs one send,
+        # unless the two together are over Discord's embed size limit.
+        embeds = [feedback_embed]
+        if next_question_embed and len(feedback_embed) + len(next_question_embed) <= _MAX_EMBED_CHARS_PER_MESSAGE:
+            embeds.append(next_question_embed)
+
+        # Answers are buffered on the session and written in batches; whatever is left is written when the quiz ends.
+        # Answers that could not be graded are not recorded.
+        answer_row = (ctx.author.id, current_q_data['question_id'], is_correct, user_answer)
+        flush_task = None
+        if is_graded and session_ended:
+            flush_task = asyncio.create_task(bot.database.record_answers_bulk([answer_row]))
+        elif is_graded:
+            session.pending_answers.append(answer_row)
+            if len(session.pending_answers) >= config.ANSWER_FLUSH_BATCH_SIZE:
+                flush_task = asyncio.create_task(bot.database.record_answers_bulk(session.take_pending_answers()))
+
+        try:
+            await ctx.send(embeds=embeds)
+        except discord.HTTPException as e:
+            log.error(f"Error sending feedback for question {current_q_data['question_id']} to channel {channel_id}: {e}", exc_info=True)
+
+        if flush_task:
+            await flush_task
+
+        if next_question_embed and len(embeds) == 1:
+            try:
+                await ctx.send(embed=next_question_embed)
+            except discord.HTTPException as e:
+                # The session already points at this question, so the quiz can't go on without it.
+                log.error(f"Error sending question {session.current_question_data['question_id']} to channel {channel_id}: {e}", exc_info=True)
+                next_question_embed = None
+
+        if next_question_embed:
+            log.info(f"Question {session.current_question_data['question_id']} sent to channel {channel_id}.")
+        elif not session_ended:
             await self._end_quiz(ctx.channel)
-        else:
-            await asyncio.sleep(1)
-            await self._ask_next_question(ctx.channel)
 
     @commands.command(name='stopquiz', help='Stops the current active quiz in this channel.')
     async def stop_quiz(self, ctx):
@@ -420,9 +557,10 @@ class QuizCommands(commands.Cog):
         session = quiz_sessions.get_quiz_session(ctx.channel.id)
         if session:
             if ctx.author.id == session.user_id or ctx.author.guild_permissions.manage_channels:
+                quiz_sessions.pop_quiz_session(ctx.channel.id)
+                await bot.database.record_answers_bulk(session.take_pending_answers())
                 await ctx.send(f"🚫 Quiz stopped! You answered {session.correct_answers_count} out of {session.questions_asked_count} questions correctly.")
                 log.info(f"Quiz in channel {ctx.channel.id} manually stopped by {ctx.author.id}. Score: {session.correct_answers_count}/{session.questions_asked_count}")
-                quiz_sessions.clear_quiz_session(ctx.channel.id)
             else:
                 await ctx.send("You can only stop quizzes that you started, or if you have 'Manage Channels' permission.")
         else:
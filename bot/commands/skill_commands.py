@@ -3,16 +3,57 @@ from discord.ext import commands
 import logging
 import asyncio
 import random
-import json
 import re
 
 import bot.database
 from bot import config, groq_api
-from ap_units import AP_UNITS_DATA
+from ap_units import SKILL_ID_SETS, UNIT_LIST_TEXT
 from bot import quiz_sessions
 
 log = logging.getLogger(__name__)
 
+# Question embed footers; identical for every question, so built once.
+_FOOTER_MCQ = ("Type your answer (e.g., A, B, C, D) using `!answer <your_choice>`\n"
+               "Report a question anytime: `!reportquestion <question_id> <reason>`")
+_FOOTER_FREE = ("Type your answer (e.g., your answer) using `!answer <your_choice>`\n"
+                "Report a question anytime: `!reportquestion <question_id> <reason>`")
+
+# Formats the "Details" field: unit, skill, difficulty, type, calculator
+_format_details = "Unit: {} | Skill: {}\nDifficulty: {} | Type: {}\nCalculator: {}".format
+
+# Question IDs accepted by !reportquestion, e.g. 1-1.3-602512
+_QID_RE = re.compile(r"\d+-\d+\.\d+-\d+")
+
+def _prepare_question_view(question_data):
+    """
+    Shuffles and letters a question's options once, when it is loaded into the session.
+    Returns (options_text, options_map, correct_letter); options_text is None for FRQs.
+    Raises ValueError if the options are malformed.
+    """
+    if question_data['representation_type'] != 'MCQ' or not question_data['options']:
+        return None, {}, None
+    if not isinstance(question_data['options'], list):
+        raise ValueError(f"Options for {question_data['question_id']} is not a list: {question_data['options']}")
+
+    clean_options = [opt.strip() for opt in question_data['options'] if opt and opt.strip()]
+    clean_options = list(dict.fromkeys(clean_options))
+
+    if len(clean_options) < 4:
+        log.warning(f"MCQ question {question_data['question_id']} has less than 4 unique options after cleaning: {clean_options}")
+
+    random.shuffle(clean_options)
+
+    options_map = {}
+    correct_letter = None
+    option_lines = []
+    for i, option in enumerate(clean_options):
+        letter = chr(65 + i)
+        option_lines.append(f"{letter}. {option}")
+        options_map[letter.lower()] = option
+        if option == question_data['correct_answer']:
+            correct_letter = letter
+    return "\n".join(option_lines), options_map, correct_letter
+
 class QuizCommands(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
@@ -25,7 +66,6 @@ class QuizCommands(commands.Cog):
             log.error(f"Attempted to send question for channel {channel.id} but current_question_data is None.")
             await channel.send("An error occurred while fetching the question. Please try starting a new quiz.")
             quiz_session.clear_current_question() 
-            quiz_sessions.set_quiz_session(channel.id, quiz_session)
             return
 
         embed = discord.Embed(
@@ -34,81 +74,56 @@ class QuizCommands(commands.Cog):
             color=discord.Color.blue()
         )
 
-        options_text = ""
-        current_quiz_state = quiz_session
-
-        current_quiz_state.current_options_map = {}
-        current_quiz_state.correct_letter = None
-
-        if question_data['options']:
-            if not isinstance(question_data['options'], list):
-                log.error(f"Options for {question_data['question_id']} is not a list: {question_data['options']}")
-                await channel.send("Error: Question options are malformed. Please report this question.")
-                return
-
-            clean_options = [opt.strip() for opt in question_data['options'] if opt and opt.strip()]
-            clean_options = list(dict.fromkeys(clean_options))
-
-            if question_data['representation_type'] == 'MCQ' and len(clean_options) < 4:
-                log.warning(f"MCQ question {question_data['question_id']} has less than 4 unique options after cleaning: {clean_options}")
-
-            shuffled_options = list(clean_options)
-            random.shuffle(shuffled_options)
+        # Options were shuffled and lettered when the question was loaded (see _prepare_question_view).
+        if quiz_session.current_options_text:
+            embed.add_field(name="Options", value=quiz_session.current_options_text, inline=False)
 
-            for i, option in enumerate(shuffled_options):
-                letter = chr(65 + i)
-                options_text += f"{letter}. {option}\n"
-                current_quiz_state.current_options_map[letter.lower()] = option
-                if option == question_data['correct_answer']:
-                    current_quiz_state.correct_letter = letter
-
-            embed.add_field(name="Options", value=options_text, inline=False)
-
-        embed.add_field(name="Details", value=(
-            f"Unit: {question_data['unit_number']} | Skill: {question_data['skill_id']}\n"
-            f"Difficulty: {question_data['difficulty']} | Type: {question_data['representation_type']}\n"
-            f"Calculator: {'Yes' if question_data['calculator_active'] else 'No'}"
+        embed.add_field(name="Details", value=_format_details(
+            question_data['unit_number'],
+            question_data['skill_id'],
+            question_data['difficulty'],
+            question_data['representation_type'],
+            'Yes' if question_data['calculator_active'] else 'No'
         ), inline=False)
 
-        embed.set_footer(text=f"Type your answer (e.g., {'A, B, C, D' if question_data['representation_type'] == 'MCQ' else 'your answer'}) using `!answer <your_choice>`\nReport a question anytime: `!reportquestion <question_id> <reason>`")
+        embed.set_footer(text=_FOOTER_MCQ if question_data['representation_type'] == 'MCQ' else _FOOTER_FREE)
 
         await channel.send(embed=embed)
         log.info(f"Question {question_data['question_id']} sent to channel {channel.id}.")
 
-        quiz_session.last_activity_time = asyncio.get_event_loop().time()
-        quiz_sessions.set_quiz_session(channel.id, quiz_session)
-
     async def _ask_next_question(self, channel):
         """Asks the next question in the quiz session."""
         session = quiz_sessions.get_quiz_session(channel.id)
-        if not session or session.is_complete():
-            await self._end_quiz(channel)
-            return
-
-        if not session.questions_to_ask:
-            question_data = await bot.database.get_random_question(
-                unit_number=session.unit_number,
-                skill_id=session.skill_id
-            )
-            if not question_data:
-                await channel.send("I ran out of questions! Please try a different unit/skill or add more questions.")
+        while True:
+            if not session or session.is_complete():
                 await self._end_quiz(channel)
                 return
-            session.questions_to_ask.append(question_data)
 
-        next_question = session.questions_to_ask.pop(0)
+            # start_quiz queues one question per question asked, so the queue only empties once the quiz is complete.
+            next_question = session.questions_to_ask.popleft()
+            try:
+                session.current_options_text, session.current_options_map, session.correct_letter = _prepare_question_view(next_question)
+                break
+            except ValueError as e:
+                log.error(str(e))
+                # The previous question must not stay answerable while this message is sent.
+                session.clear_current_question()
+                await channel.send(f"Error: Question `{next_question['question_id']}` has malformed options and was skipped. Please report this question.")
+                # The question is dropped from the quiz, so the queue still holds exactly the questions left to ask.
+                session.num_questions -= 1
         session.current_question_data = next_question
+        session.correct_answer_text = next_question['correct_answer'].strip().lower()
         session.questions_asked_count += 1
         session.questions_history.append(next_question['question_id'])
 
         await self._send_question(channel, session)
-        session.last_activity_time = asyncio.get_event_loop().time()
-        quiz_sessions.set_quiz_session(channel.id, session)
         log.info(f"Question {session.current_question_data['question_id']} asked in channel {channel.id}.")
 
     async def _end_quiz(self, channel, show_final_score: bool = True):
         """Ends the quiz session and provides a summary."""
-        session = quiz_sessions.get_quiz_session(channel.id)
+        session = quiz_sessions.pop_quiz_session(channel.id)
+        if session:
+            await bot.database.record_answers_bulk(session.take_pending_answers())
         if session and show_final_score:
             await channel.send(
                 f"🎉 Quiz complete! You answered {session.correct_answers_count} out of {session.questions_asked_count} questions correctly."
@@ -116,20 +131,21 @@ class QuizCommands(commands.Cog):
             log.info(f"Quiz ended in channel {channel.id} for user {session.user_id}. Score: {session.correct_answers_count}/{session.questions_asked_count}")
         elif not session:
             log.info(f"Attempted to end quiz in channel {channel.id} but no session found.")
-        quiz_sessions.clear_quiz_session(channel.id)
 
 
     @commands.command(name="startquiz", help="Starts a quiz with specified number of questions, unit, and skill.")
     async def start_quiz(self, ctx, num_questions: int = config.DEFAULT_QUIZ_QUESTION_COUNT, unit_number: int = config.DEFAULT_QUIZ_UNIT, skill_id: str = config.DEFAULT_QUIZ_SKILL):
         """Starts a quiz."""
-        if ctx.channel.id in quiz_sessions.active_quiz_sessions:
+        if quiz_sessions.get_quiz_session(ctx.channel.id) is not None:
             await ctx.send("A quiz is already active in this channel. Please finish or stop the current quiz (!stopquiz) before starting a new one.")
             return
 
-        if unit_number is not None and unit_number not in AP_UNITS_DATA:
-            await ctx.send(f"❌ Invalid unit number: {unit_number}. Please choose a unit from {', '.join(map(str, AP_UNITS_DATA.keys()))}.")
+        # One lookup serves both checks; None means no unit was given or it doesn't exist.
+        unit_skill_ids = SKILL_ID_SETS.get(unit_number) if unit_number is not None else None
+        if unit_number is not None and unit_skill_ids is None:
+            await ctx.send(f"❌ Invalid unit number: {unit_number}. Please choose a unit from {UNIT_LIST_TEXT}.")
             return
-        if skill_id is not None and (unit_number is None or skill_id not in AP_UNITS_DATA[unit_number]["skills"]):
+        if skill_id is not None and (unit_skill_ids is None or skill_id not in unit_skill_ids):
             await ctx.send(f"❌ Invalid skill ID: `{skill_id}` for Unit {unit_number}. Use `!listskills` to see available skills.")
             return
 
@@ -140,33 +156,24 @@ class QuizCommands(commands.Cog):
 
         questions_data = []
         if unit_number is not None and skill_id is not None:
-            all_skill_questions = await bot.database.get_questions_by_skill(unit_number, skill_id)
-            if not all_skill_questions:
+            # Sampled from the cached question pool for the skill, so repeated quizzes do not query the database.
+            questions_data = await bot.database.get_random_questions_by_skill(unit_number, skill_id, num_questions)
+            if not questions_data:
                 await ctx.send(f"No questions found for Unit {unit_number}, Skill {skill_id}.")
                 return
-            random.shuffle(all_skill_questions)
-            questions_data = all_skill_questions[:num_questions]
         elif unit_number is not None:
-            all_unit_questions = await bot.database.get_questions_by_unit_list([unit_number])
-            if not all_unit_questions:
+            questions_data = await bot.database.get_random_questions_by_unit_list([unit_number], num_questions)
+            if not questions_data:
                 await ctx.send(f"No questions found for Unit {unit_number}.")
                 return
-            random.shuffle(all_unit_questions)
-            questions_data = all_unit_questions[:num_questions]
         else:
             total_questions_in_db = await bot.database.get_total_question_count()
             if total_questions_in_db == 0:
                 await ctx.send("The database is empty! Please populate it with questions using `!populatedb` (Admin only).")
                 return
 
-            fetched_count = 0
-            max_attempts = num_questions * 5
-            while fetched_count < num_questions and max_attempts > 0:
-                q = await bot.database.get_random_question()
-                if q and q['question_id'] not in [q_data['question_id'] for q_data in questions_data]:
-                    questions_data.append(q)
-                    fetched_count += 1
-                max_attempts -= 1
+            # One query returns distinct random questions, instead of retrying single-question fetches.
+            questions_data = await bot.database.get_random_questions(num_questions)
 
             if not questions_data:
                 await ctx.send("Could not find enough unique random questions. Try being more specific or add more questions.")
@@ -183,20 +190,19 @@ class QuizCommands(commands.Cog):
             skill_id=skill_id,
             num_questions=len(questions_data)
         )
-        session.questions_to_ask = questions_data
+        session.questions_to_ask.extend(questions_data)
         quiz_sessions.set_quiz_session(ctx.channel.id, session)
 
         await ctx.send(f"Starting a {len(questions_data)}-question quiz from {f'Unit {unit_number}' if unit_number else 'any unit'}{f', Skill {skill_id}' if skill_id else ''}. Good luck!")
         log.info(f"Starting quiz in channel {ctx.channel.id} for {len(questions_data)} questions.")
 
         await self._ask_next_question(ctx.channel)
-        session.last_activity_time = asyncio.get_event_loop().time()
-        quiz_sessions.set_quiz_session(ctx.channel.id, session)
+        session.touch()
 
     @commands.command(name="stopquiz", help="Stops the current quiz in the channel.")
     async def stop_quiz(self, ctx):
         """Stops the current quiz."""
-        if ctx.channel.id not in quiz_sessions.active_quiz_sessions:
+        if quiz_sessions.get_quiz_session(ctx.channel.id) is None:
             await ctx.send("There is no active quiz in this channel.")
             return
 
@@ -216,6 +222,8 @@ class QuizCommands(commands.Cog):
         if not session or not session.current_question_data:
             return
 
+        # One activity update per answer; the helpers that follow don't touch it.
+        session.touch()
         current_q_data = session.current_question_data
 
         is_correct = False
@@ -224,15 +232,17 @@ class QuizCommands(commands.Cog):
         log.debug(f"User {message.author.id} answering question {current_q_data['question_id']} with '{user_answer}'.")
 
         if current_q_data['representation_type'] == 'MCQ':
-            correct_answer_value = current_q_data['correct_answer'].strip().lower()
-
-            if user_answer.strip().lower() in session.current_options_map:
-                selected_option_text = session.current_options_map[user_answer.strip().lower()]
-                is_correct = (selected_option_text.lower() == correct_answer_value)
-                user_answer_for_record = f"Choice {user_answer.strip().upper()}: {selected_option_text}"
+            # Normalized once per answer; the correct answer was normalized when the question was loaded.
+            user_answer_stripped = user_answer.strip()
+            user_answer_lower = user_answer_stripped.lower()
+            selected_option_text = session.current_options_map.get(user_answer_lower)
+
+            if selected_option_text is not None:
+                is_correct = (selected_option_text.lower() == session.correct_answer_text)
+                user_answer_for_record = f"Choice {user_answer_stripped.upper()}: {selected_option_text}"
             else:
-                is_correct = (user_answer.strip().lower() == correct_answer_value)
-                user_answer_for_record = user_answer.strip()
+                is_correct = (user_answer_lower == session.correct_answer_text)
+                user_answer_for_record = user_answer_stripped
 
         elif current_q_data['representation_type'] == 'FRQ':
             grading_result = await groq_api.grade_frq_answer(
@@ -247,47 +257,63 @@ class QuizCommands(commands.Cog):
             is_correct = (assessment.lower() == 'correct')
             user_answer_for_record = user_answer.strip()
 
-        # Record the answer in the database
-        await bot.database.record_answer(
-            message.author.id,
-            current_q_data['question_id'],
-            is_correct,
-            user_answer_for_record
-        )
+        # The quiz may have been stopped or timed out while an FRQ answer was being graded. Its buffered
+        # answers were written then, so this answer is written on its own and the quiz is not moved on.
+        session_ended = quiz_sessions.get_quiz_session(channel_id) is not session
+
+        # Answers are buffered on the session and written in batches; whatever is left is written when the quiz ends.
+        answer_row = (message.author.id, current_q_data['question_id'], is_correct, user_answer_for_record)
+        flush_task = None
+        if session_ended:
+            flush_task = asyncio.create_task(bot.database.record_answers_bulk([answer_row]))
+        else:
+            session.pending_answers.append(answer_row)
+            if len(session.pending_answers) >= config.ANSWER_FLUSH_BATCH_SIZE:
+                flush_task = asyncio.create_task(bot.database.record_answers_bulk(session.take_pending_answers()))
 
         if is_correct:
             session.correct_answers_count += 1
-            await message.channel.send(f"✅ Correct! Well done, {message.author.mention}!")
+            feedback_embed = discord.Embed(
+                description=f"✅ Correct! Well done, {message.author.mention}!",
+                color=discord.Color.green()
+            )
         else:
             correct_answer_display = current_q_data['correct_answer']
             if current_q_data['representation_type'] == 'MCQ' and session.correct_letter:
                 correct_answer_display = f"{session.correct_letter}. {session.current_options_map.get(session.correct_letter.lower(), correct_answer_display)}"
 
-            await message.channel.send(
-                f"❌ Incorrect, {message.author.mention}. The correct answer was: ||{correct_answer_display}||.\n"
-                f"**Explanation:** {current_q_data['explanation']}"
+            feedback_embed = discord.Embed(
+                description=f"❌ Incorrect, {message.author.mention}. The correct answer was: ||{correct_answer_display}||.\n"
+                            f"**Explanation:** {current_q_data['explanation']}",
+                color=discord.Color.red()
             )
 
+        # FRQ feedback goes in the same embed, so each answer costs one message.
         if current_q_data['representation_type'] == 'FRQ' and feedback_message:
-            await message.channel.send(f"**AI Feedback:** {feedback_message}")
+            if len(feedback_message) > 1024:
+                feedback_message = feedback_message[:1020] + "..."
+            feedback_embed.add_field(name="AI Feedback", value=feedback_message, inline=False)
+
+        await message.channel.send(embed=feedback_embed, allowed_mentions=discord.AllowedMentions.none())
+
+        if flush_task:
+            await flush_task
 
         log.info(f"User {message.author.id} answered question {current_q_data['question_id']}. Correct: {is_correct}. "
                  f"Asked: {session.questions_asked_count}/{session.num_questions}. "
                  f"Correct count: {session.correct_answers_count}")
 
-        quiz_sessions.set_quiz_session(channel_id, session)
-
+        if session_ended:
+            return
         if session.is_complete():
-            await asyncio.sleep(1)
             await self._end_quiz(message.channel)
         else:
-            await asyncio.sleep(1)
             await self._ask_next_question(message.channel)
 
     @commands.command(name="reportquestion", help="Reports a question for review.")
     async def report_question_command(self, ctx, question_id: str, *, reason: str):
         """Reports a question for review by administrators."""
-        if not re.match(r"^\d+-\d+\.\d+-\d+$", question_id):
+        if not _QID_RE.fullmatch(question_id):
             await ctx.send("❌ Invalid question ID format. Please use the format `Unit-Skill.Subskill-QuestionNumber` (e.g., `1-1.3-602512`).")
             log.warning(f"User {ctx.author.name} provided invalid question ID format for reporting: {question_id}.")
             return
@@ -16,15 +16,22 @@ QUIZ_TIMEOUT_MINUTES = 5
 QUIZ_TIMEOUT_SECONDS = 300  # Calculated from QUIZ_TIMEOUT_MINUTES for internal use
 QUIZ_SESSION_TIMEOUT_SECONDS = 300 # Inactivity timeout for a quiz session
 QUIZ_TIMEOUT_CHECK_INTERVAL_MINUTES = 1 # How often the bot checks for timed-out quizzes
+# Quiz answers are buffered on the session and written to the database in batches of this size
+ANSWER_FLUSH_BATCH_SIZE = 5
+
+# How long resolved Discord usernames are cached (used when listing reports)
+USER_NAME_CACHE_TTL_SECONDS = 600
+# Maximum number of concurrent Discord user lookups
+USER_FETCH_CONCURRENCY = 5
 
 # Discord Bot Token - Retrieved from environment variables for security
 DISCORD_BOT_TOKEN = os.getenv("DISCORD_BOT_TOKEN")
 
-# List of Discord User IDs who have administrative privileges for the bot.
+# Set of Discord User IDs who have administrative privileges for the bot.
 # Enable Developer Mode in Discord, then right-click your profile and select "Copy ID" to get your ID.
-ADMIN_USER_IDS = [
+ADMIN_USER_IDS = frozenset(
     int(uid) for uid in os.getenv("ADMIN_USER_IDS", "").split(',') if uid.strip()
-]
+)
 
 # Groq API Key - Retrieved from environment variables
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
@@ -33,6 +40,14 @@ GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 GROQ_DEFAULT_MODEL = "llama-3.3-70b-versatile"
 GROQ_DEFAULT_TEMPERATURE = 0.7
 GROQ_DEFAULT_MAX_TOKENS = 4000
+# Maximum number of question generation requests sent to Groq at the same time
+GROQ_MAX_CONCURRENT_REQUESTS = 5
+# Maximum number of free-response grading requests sent to Groq at the same time, across all channels
+GROQ_MAX_CONCURRENT_GRADING_REQUESTS = 8
+# How long to wait for the AI to grade a free-response answer before moving on
+GROQ_GRADING_TIMEOUT_SECONDS = 15
+# Number of failed generations after which !populatedb cancels the remaining requests
+POPULATE_DB_MAX_FAILURES = 5
 
 # --- Database Configuration ---
 # Directory where the SQLite database file will be stored.
@@ -42,6 +57,22 @@ DB_DIRECTORY = os.getenv("DB_DIRECTORY", "C:\\CalcBotData")
 # Full path to the SQLite database file.
 DATABASE_URL = os.path.join(DB_DIRECTORY, "questions.db")
 
+# Number of prepared SQL statements kept per database connection (sqlite3's statement cache)
+DB_STATEMENT_CACHE_SIZE = 256
+
+# Number of read-only database connections used for SELECT queries alongside the single writer
+DB_READER_POOL_SIZE = 4
+# SQLite page cache per connection, in KiB (passed to PRAGMA cache_size as a negative number)
+DB_PAGE_CACHE_KIB = 65536
+# Bytes of the database file SQLite may memory-map for reads
+DB_MMAP_SIZE_BYTES = 256 * 1024 * 1024
+
+# In-memory cache for single-question lookups by ID
+QUESTION_CACHE_MAX_SIZE = 2048
+QUESTION_CACHE_TTL_SECONDS = 60
+# How long the active question pool of a unit or skill is cached for sampling quiz questions
+QUESTION_POOL_CACHE_TTL_SECONDS = 300
+
 # --- Logging Configuration ---
 # Sets the minimum level of messages to log (e.g., INFO, DEBUG, WARNING, ERROR, CRITICAL)
 LOG_LEVEL = logging.INFO
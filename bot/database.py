@@ -1,15 +1,39 @@
 import aiosqlite
+import asyncio
 import logging
-import json
 import random
 import re
 import os
-from bot import config
+import pathlib
+import time
+from collections import OrderedDict, defaultdict
+from contextlib import asynccontextmanager
+from bot import config, jsonx
 
 log = logging.getLogger(__name__)
 
 _db_connection = None
 
+# Held around every write on _db_connection, from the first statement to its commit or rollback. The
+# connection is shared, so without it one coroutine's commit or rollback would also end a transaction
+# another coroutine has in progress.
+_write_lock = asyncio.Lock()
+
+# Read-only connections for SELECT queries, so reads don't queue behind each other or the writer.
+# Under WAL they read the last committed state while _db_connection writes.
+_reader_pool = None # asyncio.Queue of idle reader connections, created on first use
+_reader_connections = [] # Every open reader connection, for closing
+_reader_pool_lock = asyncio.Lock()
+
+# LRU cache for get_question_cached, keyed by question ID.
+_question_cache = OrderedDict() # Example: {question_id: (question_data, cached_at_monotonic)}
+
+# Active questions per unit or skill, sampled from when building quizzes. skill_id is None for a whole unit.
+_question_pool_cache = {} # Example: {(unit_number, skill_id): (tuple_of_questions, cached_at_monotonic)}
+
+# Total number of questions, counted once and kept until the next question write. None means not counted yet.
+_question_count = None
+
 async def get_db_connection():
     """
     Establishes and returns a single, global database connection.
@@ -24,76 +48,137 @@ async def get_db_connection():
             log.critical(f"Failed to create database directory {config.DB_DIRECTORY}: {e}", exc_info=True)
             raise
 
-        _db_connection = await aiosqlite.connect(config.DATABASE_URL)
+        # sqlite3 keeps compiled statements keyed by SQL text, so every query below is parsed
+        # and planned once per connection; the cache is sized to hold all of them.
+        _db_connection = await aiosqlite.connect(config.DATABASE_URL, cached_statements=config.DB_STATEMENT_CACHE_SIZE)
         print(f"Connecting to database at: {config.DATABASE_URL}")
         await _db_connection.execute("PRAGMA foreign_keys = ON;")
-        log.info("Database connection established and foreign keys enabled.")
+        # WAL lets reads proceed while an answer batch commits, and with synchronous=NORMAL a commit
+        # needs no fsync of the main database file. The larger page cache and mmap keep hot pages in memory.
+        await _db_connection.execute("PRAGMA journal_mode = WAL;")
+        await _db_connection.execute("PRAGMA synchronous = NORMAL;")
+        await _db_connection.execute("PRAGMA wal_autocheckpoint = 1000;")
+        await _db_connection.execute(f"PRAGMA cache_size = -{config.DB_PAGE_CACHE_KIB};")
+        await _db_connection.execute(f"PRAGMA mmap_size = {config.DB_MMAP_SIZE_BYTES};")
+        await _db_connection.execute("PRAGMA temp_store = MEMORY;")
+        log.info("Database connection established with foreign keys and WAL enabled.")
     return _db_connection
 
+async def _get_reader_pool():
+    """
+    Returns the queue of read-only connections, opening config.DB_READER_POOL_SIZE of them on first use.
+    The writer connection is opened first so the database file and WAL mode exist.
+    """
+    global _reader_pool
+    if _reader_pool is not None:
+        return _reader_pool
+    async with _reader_pool_lock:
+        if _reader_pool is None:
+            await get_db_connection()
+            reader_uri = pathlib.Path(config.DATABASE_URL).resolve().as_uri() + "?mode=ro"
+            pool = asyncio.Queue()
+            for _ in range(config.DB_READER_POOL_SIZE):
+                conn = await aiosqlite.connect(reader_uri, uri=True, cached_statements=config.DB_STATEMENT_CACHE_SIZE)
+                await conn.execute(f"PRAGMA cache_size = -{config.DB_PAGE_CACHE_KIB};")
+                await conn.execute(f"PRAGMA mmap_size = {config.DB_MMAP_SIZE_BYTES};")
+                await conn.execute("PRAGMA temp_store = MEMORY;")
+                _reader_connections.append(conn)
+                pool.put_nowait(conn)
+            _reader_pool = pool
+            log.info(f"Opened {config.DB_READER_POOL_SIZE} read-only database connections.")
+    return _reader_pool
+
+@asynccontextmanager
+async def _reader():
+    """Borrows a read-only connection from the pool for the duration of the block."""
+    pool = await _get_reader_pool()
+    conn = await pool.get()
+    try:
+        yield conn
+    finally:
+        pool.put_nowait(conn)
+
 async def initialize_db():
     """
     Initializes the database by creating necessary tables if they do not already exist.
     Tables include 'users', 'questions', 'reports', and 'answers'.
     """
     conn = await get_db_connection()
-    
-    await conn.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            user_id INTEGER PRIMARY KEY,
-            username TEXT NOT NULL,
-            correct_answers INTEGER DEFAULT 0,
-            total_answers INTEGER DEFAULT 0,
-            registration_date TEXT DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-
-    await conn.execute('''
-        CREATE TABLE IF NOT EXISTS questions (
-            question_id TEXT PRIMARY KEY,
-            unit_number INTEGER NOT NULL,
-            skill_id TEXT NOT NULL,
-            question_text TEXT NOT NULL,
-            options TEXT,
-            correct_answer TEXT NOT NULL,
-            explanation TEXT NOT NULL,
-            representation_type TEXT NOT NULL,
-            difficulty TEXT NOT NULL,
-            calculator_active BOOLEAN NOT NULL,
-            generated_at TEXT DEFAULT CURRENT_TIMESTAMP,
-            is_disabled BOOLEAN DEFAULT FALSE
-        )
-    ''')
-
-    await conn.execute('''
-        CREATE TABLE IF NOT EXISTS reports (
-            report_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            question_id TEXT NOT NULL,
-            user_id INTEGER NOT NULL,
-            reason TEXT,
-            report_date TEXT DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (question_id) REFERENCES questions (question_id) ON DELETE CASCADE,
-            FOREIGN KEY (user_id) REFERENCES users (user_id) ON DELETE CASCADE
-        )
-    ''')
-
-    await conn.execute('''
-        CREATE TABLE IF NOT EXISTS answers (
-            answer_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            question_id TEXT NOT NULL,
-            is_correct BOOLEAN NOT NULL,
-            user_answer TEXT NOT NULL,
-            timestamp TEXT DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users (user_id) ON DELETE CASCADE,
-            FOREIGN KEY (question_id) REFERENCES questions (question_id) ON DELETE CASCADE
-        )
-    ''')
-    await conn.commit()
-    log.info("Database initialized with users, questions, reports, and answers tables.")
+    async with _write_lock:
+        await conn.execute('''
+            CREATE TABLE IF NOT EXISTS users (
+                user_id INTEGER PRIMARY KEY,
+                username TEXT NOT NULL,
+                correct_answers INTEGER DEFAULT 0,
+                total_answers INTEGER DEFAULT 0,
+                registration_date TEXT DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+
+        await conn.execute('''
+            CREATE TABLE IF NOT EXISTS questions (
+                question_id TEXT PRIMARY KEY,
+                unit_number INTEGER NOT NULL,
+                skill_id TEXT NOT NULL,
+                question_text TEXT NOT NULL,
+                options BLOB,
+                correct_answer TEXT NOT NULL,
+                explanation TEXT NOT NULL,
+                representation_type TEXT NOT NULL,
+                difficulty TEXT NOT NULL,
+                calculator_active BOOLEAN NOT NULL,
+                generated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                is_disabled BOOLEAN DEFAULT FALSE
+            )
+        ''')
+
+        await conn.execute('''
+            CREATE TABLE IF NOT EXISTS reports (
+                report_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                question_id TEXT NOT NULL,
+                user_id INTEGER NOT NULL,
+                reason TEXT,
+                report_date TEXT DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (question_id) REFERENCES questions (question_id) ON DELETE CASCADE,
+                FOREIGN KEY (user_id) REFERENCES users (user_id) ON DELETE CASCADE
+            )
+        ''')
+
+        await conn.execute('''
+            CREATE TABLE IF NOT EXISTS answers (
+                answer_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                question_id TEXT NOT NULL,
+                is_correct BOOLEAN NOT NULL,
+                user_answer TEXT NOT NULL,
+                timestamp TEXT DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES users (user_id) ON DELETE CASCADE,
+                FOREIGN KEY (question_id) REFERENCES questions (question_id) ON DELETE CASCADE
+            )
+        ''')
+
+        # Indexes for the filtered question queries (partial, matching their is_disabled = FALSE predicate),
+        # the report listing, and the foreign keys that deletes cascade through.
+        await conn.execute("CREATE INDEX IF NOT EXISTS idx_questions_unit_skill_active ON questions (unit_number, skill_id) WHERE is_disabled = FALSE")
+        await conn.execute("CREATE INDEX IF NOT EXISTS idx_questions_generated_active ON questions (generated_at) WHERE is_disabled = FALSE")
+        await conn.execute("CREATE INDEX IF NOT EXISTS idx_reports_date ON reports (report_date)")
+        await conn.execute("CREATE INDEX IF NOT EXISTS idx_reports_question ON reports (question_id)")
+        await conn.execute("CREATE INDEX IF NOT EXISTS idx_answers_user ON answers (user_id)")
+        await conn.execute("CREATE INDEX IF NOT EXISTS idx_answers_question ON answers (question_id)")
+        await conn.commit()
+
+        # Refreshes the query planner's statistics; analysis_limit keeps this quick on large tables.
+        await conn.execute("PRAGMA analysis_limit = 400")
+        await conn.execute("ANALYZE")
+        await conn.commit()
+        log.info("Database initialized with users, questions, reports, and answers tables.")
 
 async def close_db_connection():
     """Closes the global database connection if it is open."""
-    global _db_connection
+    global _db_connection, _reader_pool
+    _reader_pool = None
+    while _reader_connections:
+        await _reader_connections.pop().close()
     if _db_connection:
         await _db_connection.close()
         _db_connection = None
@@ -105,12 +190,29 @@ async def add_user(user_id: int, username: str):
     Updates username if user_id exists.
     """
     conn = await get_db_connection()
-    await conn.execute(
-        "INSERT OR IGNORE INTO users (user_id, username) VALUES (?, ?)",
-        (user_id, username)
+    async with _write_lock:
+        await conn.execute(
+            "INSERT OR IGNORE INTO users (user_id, username) VALUES (?, ?)",
+            (user_id, username)
+        )
+        await conn.commit()
+        log.info(f"User {username} ({user_id}) added or already exists.")
+
+def _question_to_row(question_data: dict):
+    """Converts a question dictionary into the parameter tuple for an INSERT into questions."""
+    return (
+        question_data['question_id'],
+        question_data['unit_number'],
+        question_data['skill_id'],
+        question_data['question_text'],
+        # Stored as the raw orjson bytes; rows written before this as TEXT still load the same way.
+        jsonx.dumpb(question_data['options']) if question_data['options'] is not None else None,
+        question_data['correct_answer'],
+        question_data['explanation'],
+        question_data['representation_type'],
+        question_data['difficulty'],
+        question_data['calculator_active']
     )
-    await conn.commit()
-    log.info(f"User {username} ({user_id}) added or already exists.")
 
 async def add_question(question_data: dict):
     """
@@ -118,54 +220,81 @@ async def add_question(question_data: dict):
     Returns True on success, False if the question already exists or an error occurs.
     """
     conn = await get_db_connection()
-    options_json = json.dumps(question_data['options']) if question_data['options'] is not None else None
-    try:
-        await conn.execute(
-            """
-            INSERT INTO questions (question_id, unit_number, skill_id, question_text, options, correct_answer, explanation, representation_type, difficulty, calculator_active)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            (
-                question_data['question_id'],
-                question_data['unit_number'],
-                question_data['skill_id'],
-                question_data['question_text'],
-                options_json,
-                question_data['correct_answer'],
-                question_data['explanation'],
-                question_data['representation_type'],
-                question_data['difficulty'],
-                question_data['calculator_active']
+    async with _write_lock:
+        try:
+            await conn.execute(
+                """
+                INSERT INTO questions (question_id, unit_number, skill_id, question_text, options, correct_answer, explanation, representation_type, difficulty, calculator_active)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                _question_to_row(question_data)
             )
-        )
-        await conn.commit()
-        log.info(f"Question {question_data['question_id']} added to database.")
-        return True
-    except aiosqlite.IntegrityError:
-        log.warning(f"Question {question_data['question_id']} already exists, skipping.")
-        return False
-    except Exception as e:
-        log.error(f"Error adding question {question_data['question_id']}: {e}", exc_info=True)
-        return False
+            await conn.commit()
+            invalidate_question_cache(question_data['question_id'])
+            log.info(f"Question {question_data['question_id']} added to database.")
+            return True
+        except aiosqlite.IntegrityError:
+            await conn.rollback()
+            log.warning(f"Question {question_data['question_id']} already exists, skipping.")
+            return False
+        except Exception as e:
+            await conn.rollback()
+            log.error(f"Error adding question {question_data['question_id']}: {e}", exc_info=True)
+            return False
+
+async def add_questions_bulk(questions: list):
+    """
+    Adds multiple questions to the database in a single transaction.
+    Questions whose IDs already exist are skipped.
+    Returns the number of questions actually inserted.
+    """
+    if not questions:
+        return 0
+
+    conn = await get_db_connection()
+    rows = [_question_to_row(question_data) for question_data in questions]
+    async with _write_lock:
+        try:
+            cursor = await conn.executemany(
+                """
+                INSERT OR IGNORE INTO questions (question_id, unit_number, skill_id, question_text, options, correct_answer, explanation, representation_type, difficulty, calculator_active)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                rows
+            )
+            await conn.commit()
+        except Exception as e:
+            await conn.rollback()
+            log.error(f"Error bulk adding {len(rows)} questions: {e}", exc_info=True)
+            return 0
+
+    for question_data in questions:
+        invalidate_question_cache(question_data['question_id'])
+
+    inserted_count = cursor.rowcount
+    if inserted_count < len(rows):
+        log.warning(f"{len(rows) - inserted_count} of {len(rows)} questions already existed, skipped.")
+    log.info(f"Bulk added {inserted_count} questions to database.")
+    return inserted_count
 
 async def get_question(question_id: str):
     """
     Retrieves a single question by its unique ID.
     Returns the question data as a dictionary, or None if not found.
     """
-    conn = await get_db_connection()
-    cursor = await conn.execute(
-        "SELECT question_id, unit_number, skill_id, question_text, options, correct_answer, explanation, representation_type, difficulty, calculator_active, is_disabled FROM questions WHERE question_id = ?",
-        (question_id,)
-    )
-    row = await cursor.fetchone()
+    async with _reader() as conn:
+        cursor = await conn.execute(
+            "SELECT question_id, unit_number, skill_id, question_text, options, correct_answer, explanation, representation_type, difficulty, calculator_active, is_disabled FROM questions WHERE question_id = ?",
+            (question_id,)
+        )
+        row = await cursor.fetchone()
     if row:
         question_data = {
             "question_id": row[0],
             "unit_number": row[1],
             "skill_id": row[2],
             "question_text": row[3],
-            "options": json.loads(row[4]) if row[4] else None,
+            "options": jsonx.loads(row[4]) if row[4] else None,
             "correct_answer": row[5],
             "explanation": row[6],
             "representation_type": row[7],
@@ -178,103 +307,192 @@ async def get_question(question_id: str):
     log.debug(f"Question {question_id} not found.")
     return None
 
+async def get_question_cached(question_id: str):
+    """
+    Same as get_question, but served from an in-memory LRU cache when possible.
+    Entries expire after config.QUESTION_CACHE_TTL_SECONDS and are invalidated on writes.
+    Misses (question not found) are not cached.
+    """
+    now = time.monotonic()
+    cached = _question_cache.get(question_id)
+    if cached and now - cached[1] < config.QUESTION_CACHE_TTL_SECONDS:
+        _question_cache.move_to_end(question_id)
+        return dict(cached[0])
+
+    question_data = await get_question(question_id)
+    if question_data:
+        _question_cache[question_id] = (question_data, now)
+        _question_cache.move_to_end(question_id)
+        if len(_question_cache) > config.QUESTION_CACHE_MAX_SIZE:
+            _question_cache.popitem(last=False)
+        return dict(question_data)
+    _question_cache.pop(question_id, None)
+    return None
+
+def invalidate_question_cache(question_id: str = None):
+    """
+    Removes a single question from the lookup cache, or clears the whole cache if no ID is given.
+    Cached question pools and the question count are always cleared, since any question change can affect them.
+    """
+    global _question_count
+    _question_pool_cache.clear()
+    _question_count = None
+    if question_id is None:
+        _question_cache.clear()
+    else:
+        _question_cache.pop(question_id, None)
+
 async def get_random_question(unit_number: int = None, skill_id: str = None):
     """
     Retrieves a single random question, optionally filtered by unit number and skill ID.
     Only active (non-disabled) questions are considered.
     Returns the question data as a dictionary, or None if no matching questions are found.
     """
-    conn = await get_db_connection()
-    query = "SELECT question_id, unit_number, skill_id, question_text, options, correct_answer, explanation, representation_type, difficulty, calculator_active FROM questions WHERE is_disabled = FALSE"
-    params = []
-
     if unit_number:
-        query += " AND unit_number = ?"
-        params.append(unit_number)
+        # Picked from the cached unit/skill pool, so no query runs while the pool is fresh.
+        pool = await _get_question_pool(unit_number, skill_id)
+        if not pool:
+            log.info("No random question found matching criteria.")
+            return None
+        question_data = dict(random.choice(pool))
+        log.debug(f"Fetched random question: {question_data['question_id']}.")
+        return question_data
+
+    conditions = "is_disabled = FALSE"
+    params = []
     if skill_id:
-        query += " AND skill_id = ?"
+        conditions += " AND skill_id = ?"
         params.append(skill_id)
 
-    query += " ORDER BY RANDOM() LIMIT 1"
-    
-    cursor = await conn.execute(query, params)
-    row = await cursor.fetchone()
+    # Jumps to a random rowid and takes the next matching row, wrapping around to the start,
+    # instead of sorting every matching row with ORDER BY RANDOM(). Both lookups walk the rowid b-tree.
+    # Rows that follow gaps (deleted or non-matching questions) are somewhat more likely to be picked.
+    row = None
+    async with _reader() as conn:
+        cursor = await conn.execute("SELECT MIN(rowid), MAX(rowid) FROM questions")
+        min_rowid, max_rowid = await cursor.fetchone()
+        if min_rowid is not None:
+            pivot = random.randint(min_rowid, max_rowid)
+            cursor = await conn.execute(
+                f"SELECT {_QUESTION_COLUMNS} FROM questions WHERE rowid >= ? AND {conditions} ORDER BY rowid LIMIT 1",
+                (pivot, *params)
+            )
+            row = await cursor.fetchone()
+            if row is None:
+                cursor = await conn.execute(
+                    f"SELECT {_QUESTION_COLUMNS} FROM questions WHERE rowid < ? AND {conditions} ORDER BY rowid LIMIT 1",
+                    (pivot, *params)
+                )
+                row = await cursor.fetchone()
 
     if row:
-        question_data = {
-            "question_id": row[0],
-            "unit_number": row[1],
-            "skill_id": row[2],
-            "question_text": row[3],
-            "options": json.loads(row[4]) if row[4] else None,
-            "correct_answer": row[5],
-            "explanation": row[6],
-            "representation_type": row[7],
-            "difficulty": row[8],
-            "calculator_active": bool(row[9])
-        }
+        question_data = _question_from_row(row)
         log.debug(f"Fetched random question: {question_data['question_id']}.")
         return question_data
     log.info("No random question found matching criteria.")
     return None
 
-async def get_questions_by_skill(unit_number: int, skill_id: str):
+# Columns selected for quiz questions, in the order expected by _question_from_row.
+_QUESTION_COLUMNS = "question_id, unit_number, skill_id, question_text, options, correct_answer, explanation, representation_type, difficulty, calculator_active"
+
+def _question_from_row(row):
+    """Converts a row selected with _QUESTION_COLUMNS into a question dictionary."""
+    return {
+        "question_id": row[0],
+        "unit_number": row[1],
+        "skill_id": row[2],
+        "question_text": row[3],
+        "options": jsonx.loads(row[4]) if row[4] else None,
+        "correct_answer": row[5],
+        "explanation": row[6],
+        "representation_type": row[7],
+        "difficulty": row[8],
+        "calculator_active": bool(row[9])
+    }
+
+async def _get_question_pool(unit_number: int, skill_id: str = None):
+    """
+    Returns all active questions for a unit, or for one skill within it, as a tuple.
+    Pools are cached for config.QUESTION_POOL_CACHE_TTL_SECONDS and cleared on question writes.
+    """
+    key = (unit_number, skill_id)
+    now = time.monotonic()
+    cached = _question_pool_cache.get(key)
+    if cached and now - cached[1] < config.QUESTION_POOL_CACHE_TTL_SECONDS:
+        return cached[0]
+
+    async with _reader() as conn:
+        if skill_id is None:
+            cursor = await conn.execute(
+                f"SELECT {_QUESTION_COLUMNS} FROM questions WHERE unit_number = ? AND is_disabled = FALSE",
+                (unit_number,)
+            )
+        else:
+            cursor = await conn.execute(
+                f"SELECT {_QUESTION_COLUMNS} FROM questions WHERE unit_number = ? AND skill_id = ? AND is_disabled = FALSE",
+                (unit_number, skill_id)
+            )
+        rows = await cursor.fetchall()
+    pool = tuple(_question_from_row(row) for row in rows)
+    _question_pool_cache[key] = (pool, now)
+    log.debug(f"Cached pool of {len(pool)} questions for U{unit_number} S{skill_id}.")
+    return pool
+
+def _sample_questions(pool, limit: int):
+    """Picks up to `limit` random questions from a pool, returning copies the caller may modify."""
+    return [dict(question_data) for question_data in random.sample(pool, min(limit, len(pool)))]
+
+async def get_random_questions_by_unit_list(unit_numbers: list, limit: int):
     """
-    Retrieves all active questions associated with a specific unit number and skill ID.
+    Retrieves up to `limit` random active questions from a given list of unit numbers.
+    Questions are sampled from the cached pool of each unit, so repeated quizzes do not query the database.
     Returns a list of question dictionaries.
     """
-    conn = await get_db_connection()
-    cursor = await conn.execute(
-        "SELECT question_id, unit_number, skill_id, question_text, options, correct_answer, explanation, representation_type, difficulty, calculator_active FROM questions WHERE unit_number = ? AND skill_id = ? AND is_disabled = FALSE",
-        (unit_number, skill_id)
-    )
-    rows = await cursor.fetchall()
-    questions = []
-    for row in rows:
-        questions.append({
-            "question_id": row[0],
-            "unit_number": row[1],
-            "skill_id": row[2],
-            "question_text": row[3],
-            "options": json.loads(row[4]) if row[4] else None,
-            "correct_answer": row[5],
-            "explanation": row[6],
-            "representation_type": row[7],
-            "difficulty": row[8],
-            "calculator_active": bool(row[9])
-        })
-    log.debug(f"Fetched {len(questions)} questions for U{unit_number} S{skill_id}.")
+    if not unit_numbers or limit <= 0:
+        return []
+
+    pool = []
+    for unit_number in unit_numbers:
+        pool.extend(await _get_question_pool(unit_number))
+    questions = _sample_questions(pool, limit)
+    log.debug(f"Sampled {len(questions)} random questions for units {unit_numbers}.")
     return questions
 
-async def get_questions_by_unit_list(unit_numbers: list):
+async def get_random_questions_by_skill(unit_number: int, skill_id: str, limit: int):
     """
-    Retrieves all active questions from a given list of unit numbers.
+    Retrieves up to `limit` random active questions for a specific unit number and skill ID.
+    Questions are sampled from the cached pool of the skill, so repeated quizzes do not query the database.
     Returns a list of question dictionaries.
     """
-    if not unit_numbers:
+    if limit <= 0:
         return []
 
-    conn = await get_db_connection()
-    placeholders = ','.join(['?'] * len(unit_numbers))
-    query = f"SELECT question_id, unit_number, skill_id, question_text, options, correct_answer, explanation, representation_type, difficulty, calculator_active FROM questions WHERE unit_number IN ({placeholders}) AND is_disabled = FALSE"
-    
-    cursor = await conn.execute(query, unit_numbers)
-    rows = await cursor.fetchall()
-    questions = []
-    for row in rows:
-        questions.append({
-            "question_id": row[0],
-            "unit_number": row[1],
-            "skill_id": row[2],
-            "question_text": row[3],
-            "options": json.loads(row[4]) if row[4] else None,
-            "correct_answer": row[5],
-            "explanation": row[6],
-            "representation_type": row[7],
-            "difficulty": row[8],
-            "calculator_active": bool(row[9])
-        })
-    log.debug(f"Fetched {len(questions)} questions for units {unit_numbers}.")
+    questions = _sample_questions(await _get_question_pool(unit_number, skill_id), limit)
+    log.debug(f"Sampled {len(questions)} random questions for U{unit_number} S{skill_id}.")
+    return questions
+
+async def get_random_questions(limit: int, exclude_ids=None):
+    """
+    Retrieves up to `limit` distinct random active questions from any unit in a single query,
+    optionally skipping the question IDs in `exclude_ids`.
+    Returns a list of question dictionaries.
+    """
+    if limit <= 0:
+        return []
+
+    query = f"SELECT {_QUESTION_COLUMNS} FROM questions WHERE is_disabled = FALSE"
+    params = []
+    if exclude_ids:
+        query += f" AND question_id NOT IN ({','.join(['?'] * len(exclude_ids))})"
+        params.extend(exclude_ids)
+    query += " ORDER BY RANDOM() LIMIT ?"
+    params.append(limit)
+
+    async with _reader() as conn:
+        cursor = await conn.execute(query, params)
+        rows = await cursor.fetchall()
+    questions = [_question_from_row(row) for row in rows]
+    log.debug(f"Sampled {len(questions)} random questions from all units.")
     return questions
 
 async def report_question(question_id: str, user_id: int, reason: str):
@@ -283,37 +501,69 @@ async def report_question(question_id: str, user_id: int, reason: str):
     Returns True on successful reporting, False otherwise.
     """
     conn = await get_db_connection()
-    try:
-        await conn.execute(
-            "INSERT INTO reports (question_id, user_id, reason) VALUES (?, ?, ?)",
-            (question_id, user_id, reason)
-        )
-        await conn.commit()
+    async with _write_lock:
+        try:
+            await conn.execute(
+                "INSERT INTO reports (question_id, user_id, reason) VALUES (?, ?, ?)",
+                (question_id, user_id, reason)
+            )
+            await conn.commit()
+            log.info(f"Question {question_id} reported by user {user_id}.")
+            return True
+        except Exception as e:
+            await conn.rollback()
+            log.error(f"Error reporting question {question_id} by user {user_id}: {e}", exc_info=True)
+            return False
+
+async def report_question_atomic(question_id: str, user_id: int, username: str, reason: str):
+    """
+    Registers the reporting user (if needed) and records their report in a single transaction.
+    The report is only inserted if the question exists, so no separate lookup is required.
+    Returns True if the report was recorded, False if the question does not exist, or None on error.
+    """
+    conn = await get_db_connection()
+    async with _write_lock:
+        try:
+            await conn.execute(
+                "INSERT OR IGNORE INTO users (user_id, username) VALUES (?, ?)",
+                (user_id, username)
+            )
+            cursor = await conn.execute(
+                "INSERT INTO reports (question_id, user_id, reason) SELECT ?, ?, ? WHERE EXISTS (SELECT 1 FROM questions WHERE question_id = ?)",
+                (question_id, user_id, reason, question_id)
+            )
+            await conn.commit()
+        except Exception as e:
+            await conn.rollback()
+            log.error(f"Error reporting question {question_id} by user {user_id}: {e}", exc_info=True)
+            return None
+
+    if cursor.rowcount > 0:
         log.info(f"Question {question_id} reported by user {user_id}.")
         return True
-    except Exception as e:
-        log.error(f"Error reporting question {question_id} by user {user_id}: {e}", exc_info=True)
-        return False
+    log.info(f"Question {question_id} not found when reported by user {user_id}.")
+    return False
 
 async def get_active_reports():
     """
     Retrieves all active question reports from the database, ordered by report date.
     Returns a list of report dictionaries.
     """
-    conn = await get_db_connection()
-    cursor = await conn.execute(
-        "SELECT report_id, question_id, user_id, reason, report_date FROM reports ORDER BY report_date DESC"
-    )
-    rows = await cursor.fetchall()
-    reports = []
-    for row in rows:
-        reports.append({
-            "report_id": row[0],
-            "question_id": row[1],
-            "user_id": row[2],
-            "reason": row[3],
-            "report_date": row[4]
-        })
+    async with _reader() as conn:
+        cursor = await conn.execute(
+            "SELECT report_id, question_id, user_id, reason, report_date FROM reports ORDER BY report_date DESC"
+        )
+        rows = await cursor.fetchall()
+    reports = [
+        {
+            "report_id": report_id,
+            "question_id": question_id,
+            "user_id": user_id,
+            "reason": reason,
+            "report_date": report_date
+        }
+        for report_id, question_id, user_id, reason, report_date in rows
+    ]
     log.debug(f"Fetched {len(reports)} active reports.")
     return reports
 
@@ -323,16 +573,17 @@ async def clear_report(question_id: str):
     Returns True if any reports were cleared, False otherwise.
     """
     conn = await get_db_connection()
-    cursor = await conn.execute(
-        "DELETE FROM reports WHERE question_id = ?",
-        (question_id,)
-    )
-    await conn.commit()
-    if cursor.rowcount > 0:
-        log.info(f"Reports cleared for question {question_id}. Rows affected: {cursor.rowcount}")
-        return True
-    log.debug(f"No reports found for question {question_id} to clear.")
-    return False
+    async with _write_lock:
+        cursor = await conn.execute(
+            "DELETE FROM reports WHERE question_id = ?",
+            (question_id,)
+        )
+        await conn.commit()
+        if cursor.rowcount > 0:
+            log.info(f"Reports cleared for question {question_id}. Rows affected: {cursor.rowcount}")
+            return True
+        log.debug(f"No reports found for question {question_id} to clear.")
+        return False
 
 async def disable_question(question_id: str, disable: bool = True):
     """
@@ -341,35 +592,89 @@ async def disable_question(question_id: str, disable: bool = True):
     Returns True if the question's status was updated, False if the question was not found.
     """
     conn = await get_db_connection()
-    cursor = await conn.execute(
-        "UPDATE questions SET is_disabled = ? WHERE question_id = ?",
-        (disable, question_id)
-    )
-    await conn.commit()
-    if cursor.rowcount > 0:
-        log.info(f"Question {question_id} disabled status set to {disable}.")
-        return True
-    log.warning(f"Question {question_id} not found for disabling/enabling.")
-    return False
+    async with _write_lock:
+        cursor = await conn.execute(
+            "UPDATE questions SET is_disabled = ? WHERE question_id = ?",
+            (disable, question_id)
+        )
+        await conn.commit()
+        invalidate_question_cache(question_id)
+        if cursor.rowcount > 0:
+            log.info(f"Question {question_id} disabled status set to {disable}.")
+            return True
+        log.warning(f"Question {question_id} not found for disabling/enabling.")
+        return False
 
 async def record_answer(user_id: int, question_id: str, is_correct: bool, user_answer: str):
     """
     Records a user's answer to a question and updates their overall statistics.
     """
     conn = await get_db_connection()
-    
-    await conn.execute(
-        "INSERT INTO answers (user_id, question_id, is_correct, user_answer) VALUES (?, ?, ?, ?)",
-        (user_id, question_id, is_correct, user_answer)
-    )
-    
-    await conn.execute(
-        "UPDATE users SET total_answers = total_answers + 1, correct_answers = correct_answers + ? WHERE user_id = ?",
-        (1 if is_correct else 0, user_id)
-    )
-    await conn.commit()
+    async with _write_lock:
+        await conn.execute(
+            "INSERT INTO answers (user_id, question_id, is_correct, user_answer) VALUES (?, ?, ?, ?)",
+            (user_id, question_id, is_correct, user_answer)
+        )
+        await conn.execute(
+            "UPDATE users SET total_answers = total_answers + 1, correct_answers = correct_answers + ? WHERE user_id = ?",
+            (1 if is_correct else 0, user_id)
+        )
+        await conn.commit()
     log.debug(f"Answer recorded for user {user_id}, question {question_id}. Correct: {is_correct}.")
 
+async def record_answers_bulk(answers: list):
+    """
+    Records multiple answers in a single transaction and updates each user's statistics.
+    Each answer is a (user_id, question_id, is_correct, user_answer) tuple.
+    Returns True on success, False on error.
+    """
+    if not answers:
+        return True
+
+    conn = await get_db_connection()
+    async with _write_lock:
+        try:
+            # Answers whose user or question no longer exists are skipped rather than failing the whole batch.
+            cursor = await conn.executemany(
+                """
+                INSERT INTO answers (user_id, question_id, is_correct, user_answer)
+                SELECT ?1, ?2, ?3, ?4
+                WHERE EXISTS (SELECT 1 FROM users WHERE user_id = ?1)
+                  AND EXISTS (SELECT 1 FROM questions WHERE question_id = ?2)
+                """,
+                answers
+            )
+            inserted_count = cursor.rowcount
+            if inserted_count < len(answers):
+                log.warning(f"Skipped {len(answers) - inserted_count} of {len(answers)} answers for unknown users or questions.")
+
+            # Statistics are summed per user in Python, so each user gets one UPDATE per batch.
+            # Answers to questions that no longer exist don't count, matching the insert above.
+            question_ids = list({question_id for _, question_id, _, _ in answers})
+            cursor = await conn.execute(
+                f"SELECT question_id FROM questions WHERE question_id IN ({','.join(['?'] * len(question_ids))})",
+                question_ids
+            )
+            existing_question_ids = {row[0] for row in await cursor.fetchall()}
+            user_deltas = defaultdict(lambda: [0, 0]) # Example: {user_id: [total_increment, correct_increment]}
+            for user_id, question_id, is_correct, _ in answers:
+                if question_id in existing_question_ids:
+                    delta = user_deltas[user_id]
+                    delta[0] += 1
+                    delta[1] += 1 if is_correct else 0
+            await conn.executemany(
+                "UPDATE users SET total_answers = total_answers + ?, correct_answers = correct_answers + ? WHERE user_id = ?",
+                [(total, correct, user_id) for user_id, (total, correct) in user_deltas.items()]
+            )
+            await conn.commit()
+        except Exception as e:
+            await conn.rollback()
+            log.error(f"Error recording {len(answers)} answers: {e}", exc_info=True)
+            return False
+
+    log.debug(f"Recorded {inserted_count} answers.")
+    return True
+
 async def get_recent_questions_overview(limit: int = 10, unit_number: int = None, skill_id: str = None):
     """
     Retrieves an overview of recently added questions, with options to filter by
@@ -377,8 +682,11 @@ async def get_recent_questions_overview(limit: int = 10, unit_number: int = None
     Returns a list of dictionaries, each containing a question ID, a snippet of the question text,
     unit number, and skill ID.
     """
-    conn = await get_db_connection()
-    query = "SELECT question_id, question_text, unit_number, skill_id FROM questions WHERE is_disabled = FALSE"
+    # The snippet is cut in SQL, so full question texts are never fetched.
+    query = (
+        "SELECT question_id, CASE WHEN length(question_text) > 150 THEN substr(question_text, 1, 150) || '...' ELSE question_text END, "
+        "unit_number, skill_id FROM questions WHERE is_disabled = FALSE"
+    )
     conditions = []
     params = []
 
@@ -397,61 +705,78 @@ async def get_recent_questions_overview(limit: int = 10, unit_number: int = None
     params.append(limit)
 
     log.debug(f"Executing overview query: {query} with params: {params}")
-    cursor = await conn.execute(query, params)
-    rows = await cursor.fetchall()
+    async with _reader() as conn:
+        cursor = await conn.execute(query, params)
+        rows = await cursor.fetchall()
     
-    questions_overview = []
-    for row in rows:
-        question_text_snippet = row[1][:150] + "..." if len(row[1]) > 150 else row[1]
-        questions_overview.append({
-            "question_id": row[0],
+    return [
+        {
+            "question_id": question_id,
             "question_text_snippet": question_text_snippet,
-            "unit_number": row[2],
-            "skill_id": row[3]
-        })
-    return questions_overview
+            "unit_number": unit_number,
+            "skill_id": skill_id
+        }
+        for question_id, question_text_snippet, unit_number, skill_id in rows
+    ]
 
 async def get_total_question_count():
     """
     Returns the total number of questions stored in the database, including disabled ones.
+    The count is cached until invalidate_question_cache runs, so COUNT(*) only scans the table after a write.
     """
-    conn = await get_db_connection()
-    cursor = await conn.execute("SELECT COUNT(*) FROM questions")
-    count = (await cursor.fetchone())[0]
-    log.debug(f"Total questions in DB: {count}")
-    return count
+    global _question_count
+    if _question_count is None:
+        async with _reader() as conn:
+            cursor = await conn.execute("SELECT COUNT(*) FROM questions")
+            _question_count = (await cursor.fetchone())[0]
+        log.debug(f"Total questions in DB: {_question_count}")
+    return _question_count
 
 async def delete_all_questions():
     """
     Deletes all questions, associated answers, and reports from the database.
     Foreign key checks are temporarily disabled to allow for mass deletion without constraint issues.
+    With them off, SQLite clears each table in one step instead of deleting row by row.
+    The database file is vacuumed afterwards to release the freed pages.
     """
     conn = await get_db_connection()
-    try:
-        await conn.execute("PRAGMA foreign_keys = OFF;")
-        await conn.commit()
+    async with _write_lock:
+        try:
+            await conn.execute("PRAGMA foreign_keys = OFF;")
+            await conn.commit()
 
-        await conn.execute("DELETE FROM answers")
-        log.info("All records deleted from 'answers' table.")
+            # One write transaction for all three tables. _write_lock keeps answer batches on this
+            # connection from running inside it.
+            await conn.execute("BEGIN IMMEDIATE")
+            await conn.execute("DELETE FROM answers")
+            log.info("All records deleted from 'answers' table.")
         
-        await conn.execute("DELETE FROM reports")
-        log.info("All records deleted from 'reports' table.")
+            await conn.execute("DELETE FROM reports")
+            log.info("All records deleted from 'reports' table.")
         
-        await conn.execute("DELETE FROM questions")
-        log.info("All records deleted from 'questions' table.")
+            await conn.execute("DELETE FROM questions")
+            log.info("All records deleted from 'questions' table.")
 
-        await conn.commit()
+            await conn.commit()
+            invalidate_question_cache()
 
-    except Exception as e:
-        log.error(f"Error during mass deletion: {e}", exc_info=True)
-        return False
-    finally:
+        except Exception as e:
+            await conn.rollback()
+            log.error(f"Error during mass deletion: {e}", exc_info=True)
+            return False
+        finally:
+            try:
+                await conn.execute("PRAGMA foreign_keys = ON;")
+                await conn.commit()
+                log.info("Foreign key constraints re-enabled.")
+            except Exception as e:
+                log.error(f"Error re-enabling foreign keys: {e}", exc_info=True)
+
+        # The rows are already gone; failing to shrink the file is not an error for the caller.
         try:
-            await conn.execute("PRAGMA foreign_keys = ON;")
-            await conn.commit()
-            log.info("Foreign key constraints re-enabled.")
+            await conn.execute("VACUUM")
         except Exception as e:
-            log.error(f"Error re-enabling foreign keys: {e}", exc_info=True)
+            log.warning(f"Could not vacuum the database after mass deletion: {e}")
     
     log.info("All questions, answers, and reports successfully deleted from the database.")
     return True
\ No newline at end of file
@@ -1,15 +1,19 @@
 import os
+import asyncio
 from groq import AsyncGroq
 import logging
-import json
 import re 
-from bot import config
-from ap_units import AP_UNITS_DATA
+from bot import config, jsonx
+from ap_units import skill_label, unit_label
 
 log = logging.getLogger(__name__)
 
 client: AsyncGroq = None
 
+# Bounds in-flight FRQ grading calls, so a burst of answers across channels queues here
+# instead of piling up requests on the client's shared connection pool.
+grading_semaphore = asyncio.Semaphore(config.GROQ_MAX_CONCURRENT_GRADING_REQUESTS)
+
 def initialize_groq_client():
     """
     Initializes the Groq API client with the API key from environment variables.
@@ -62,8 +66,8 @@ async def generate_question_json(unit_number: int, skill_id: str, question_type:
         log.error("Groq client not initialized. Call initialize_groq_client() first.")
         raise RuntimeError("Groq client not initialized.")
     
-    unit_data = AP_UNITS_DATA.get(unit_number)
-    skill_name = unit_data.get('skills', {}).get(skill_id, f"Skill {skill_id}") if unit_data else f"Skill {skill_id}"
+    unit_name = unit_label(unit_number)
+    skill_name = skill_label(unit_number, skill_id)
 
     # Defines the strict JSON schema to guide the LLM and for post-generation validation.
     json_schema = {
@@ -89,7 +93,7 @@ async def generate_question_json(unit_number: int, skill_id: str, question_type:
     You are an expert AP Calculus BC teacher. Your task is to generate a single, highly accurate and concise AP Calculus BC question in strict JSON format.
     The question must precisely match the specified unit, skill, type, difficulty, and calculator status. 
 
-    Unit: {unit_number} (Topic: {unit_data.get('name', 'N/A')})
+    Unit: {unit_number} (Topic: {unit_name})
     Skill ID: {skill_id} (Description: {skill_name})
     Question Type: {question_type}
     Difficulty: {difficulty}
@@ -164,8 +168,8 @@ async def generate_question_json(unit_number: int, skill_id: str, question_type:
         log.debug(f"Raw Groq question response: {llm_response_text}")
 
         try:
-            question_data = json.loads(llm_response_text)
-        except json.JSONDecodeError as e:
+            question_data = jsonx.loads(llm_response_text)
+        except jsonx.JSONDecodeError as e:
             log.error(f"Failed to decode JSON from Groq question response: {e}. Raw response: {llm_response_text}", exc_info=True)
             raise ValueError(f"Groq returned malformed JSON: {e}")
 
@@ -236,7 +240,9 @@ async def grade_free_response_answer(question_text: str, correct_answer: str, us
 
     Returns:
         dict: A dictionary containing 'feedback' (str), where the first word
-              determines correctness.
+              determines correctness. If the API call takes longer than
+              config.GROQ_GRADING_TIMEOUT_SECONDS, 'timed_out' is True and the
+              answer was not graded.
     """
     if client is None:
         log.error("Groq client not initialized. Call initialize_groq_client() first.")
@@ -268,26 +274,35 @@ async def grade_free_response_answer(question_text: str, correct_answer: str, us
     """
 
     try:
-        chat_completion = await client.chat.completions.create(
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are a helpful AI assistant that grades free response answers. Your response must strictly follow the format: 'Correct!' or 'Incorrect!' followed by a descriptive feedback message."
-                },
-                {
-                    "role": "user",
-                    "content": grading_prompt
-                }
-            ],
-            model=config.GROQ_DEFAULT_MODEL,
-            temperature=0.1,
-        )
+        async with grading_semaphore:
+            # The timeout starts once a grading slot is free, so time spent queueing doesn't count against it.
+            chat_completion = await asyncio.wait_for(
+                client.chat.completions.create(
+                    messages=[
+                        {
+                            "role": "system",
+                            "content": "You are a helpful AI assistant that grades free response answers. Your response must strictly follow the format: 'Correct!' or 'Incorrect!' followed by a descriptive feedback message."
+                        },
+                        {
+                            "role": "user",
+                            "content": grading_prompt
+                        }
+                    ],
+                    model=config.GROQ_DEFAULT_MODEL,
+                    temperature=0.1,
+                ),
+                timeout=config.GROQ_GRADING_TIMEOUT_SECONDS
+            )
         
         response_content = chat_completion.choices[0].message.content.strip()
         
         log.debug(f"Raw Groq FRQ grading response (first word assessment): {response_content}")
         return {"feedback": response_content}
 
+    except asyncio.TimeoutError:
+        log.warning(f"Grading FRQ answer with Groq timed out after {config.GROQ_GRADING_TIMEOUT_SECONDS}s.")
+        return {"feedback": "Grading took too long, so your answer could not be checked.", "timed_out": True}
+
     except Exception as e:
         log.error(f"Error grading FRQ answer with Groq: {e}", exc_info=True)
         return {"feedback": "An unexpected error occurred while grading your answer. Please try again."}
\ No newline at end of file
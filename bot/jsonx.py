@@ -0,0 +1,12 @@
+import orjson
+
+# Thin wrapper around orjson so call sites keep a familiar json-module shape.
+# orjson.JSONDecodeError is a subclass of json.JSONDecodeError, so existing except clauses still apply.
+
+JSONDecodeError = orjson.JSONDecodeError
+
+def dumpb(obj) -> bytes:
+    """Serializes an object to UTF-8 JSON bytes."""
+    return orjson.dumps(obj)
+
+loads = orjson.loads
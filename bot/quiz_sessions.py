@@ -1,16 +1,39 @@
 import time
+import asyncio
 import logging
+from collections import deque
 
 log = logging.getLogger(__name__)
 
 # Stores active quiz sessions, keyed by channel ID.
 # This allows for one active quiz per channel.
+# Sessions are stored by reference, so mutating a session returned by get_quiz_session
+# updates the stored session; set_quiz_session is only needed to register a new one.
 active_quiz_sessions = {} # Example: {channel_id: QuizSession_object}
 
+# Locks serializing answer handling per channel, created and removed along with the channel's session.
+channel_locks = {} # Example: {channel_id: asyncio.Lock}
+
+# last_activity_time is measured with time.monotonic(), so timeouts are unaffected by
+# wall-clock changes. Anything comparing against it must use time.monotonic() as well.
+# Timeouts are measured in minutes, so activity is only recorded once it has moved on
+# by more than this many seconds.
+ACTIVITY_UPDATE_THRESHOLD_SECONDS = 5
+
 class QuizSession:
     """
     Manages the state and progress of a single quiz session for a user in a specific channel.
     """
+    # Fixed attribute layout: no per-instance __dict__, and faster attribute access on the answer path.
+    __slots__ = (
+        'user_id', 'channel_id', 'unit_number', 'skill_id', 'num_questions',
+        'questions_asked_count', 'correct_answers_count', 'incorrect_answers_count',
+        'all_quiz_questions', 'questions_history', 'current_question_data',
+        'current_options_map', 'current_options_text', 'correct_letter', 'correct_answer_text',
+        'current_text_to_letter', 'author_avatar_url', 'pending_answers',
+        'start_time', 'last_activity_time', 'questions_to_ask',
+    )
+
     def __init__(self, user_id: int, channel_id: int, unit_number: int, skill_id: str, num_questions: int, all_quiz_questions: list):
         self.user_id = user_id
         self.channel_id = channel_id
@@ -22,25 +45,48 @@ class QuizSession:
         self.incorrect_answers_count = 0
         self.all_quiz_questions = all_quiz_questions # The complete list of questions for this quiz
         self.questions_history = []                  # IDs of questions already presented
+        self.questions_to_ask = deque()              # Questions queued to be asked next, for cogs that fetch as they go
         self.current_question_data = None            # Full data for the question currently being asked
         self.current_options_map = None              # Maps option letters (e.g., 'a') to option text for MCQs
+        self.current_options_text = None             # Rendered option lines for the current MCQ, if prepared ahead of sending
         self.correct_letter = None                   # The correct option letter for the current MCQ
+        self.correct_answer_text = None              # The correct answer text for the current question, stripped and lowercased
+        self.current_text_to_letter = None           # Maps lowercased option text back to its letter for MCQs
+        self.author_avatar_url = None                # Avatar URL of the user who started the quiz, for feedback embeds
+        self.pending_answers = []                    # Answers not yet written to the database: (user_id, question_id, is_correct, user_answer)
         self.start_time = time.time()                # When the quiz session began
-        self.last_activity_time = time.time()        # Timestamp of the last user interaction, used for timeouts
+        self.last_activity_time = time.monotonic()   # Monotonic time of the last user interaction, used for timeouts
 
-    def set_current_question(self, question_data: dict, options_map: dict = None, correct_letter: str = None):
+    def set_current_question(self, question_data: dict, options_map: dict = None, correct_letter: str = None, text_to_letter: dict = None, correct_answer_text: str = None):
         """Sets the details of the question currently being presented to the user."""
         self.current_question_data = question_data
         self.current_options_map = options_map
         self.correct_letter = correct_letter
-        self.last_activity_time = time.time()
+        self.current_text_to_letter = text_to_letter
+        self.correct_answer_text = correct_answer_text
+        self.touch()
 
     def clear_current_question(self):
         """Resets the current question data, typically after an answer is received or quiz ends."""
         self.current_question_data = None
         self.current_options_map = None
+        self.current_options_text = None
         self.correct_letter = None
-        self.last_activity_time = time.time()
+        self.current_text_to_letter = None
+        self.correct_answer_text = None
+        self.touch()
+
+    def touch(self):
+        """Records user activity, skipping the update if the last one was only a few seconds ago."""
+        now = time.monotonic()
+        if now - self.last_activity_time > ACTIVITY_UPDATE_THRESHOLD_SECONDS:
+            self.last_activity_time = now
+
+    def take_pending_answers(self) -> list:
+        """Returns the buffered answers and empties the buffer."""
+        pending_answers = self.pending_answers
+        self.pending_answers = []
+        return pending_answers
 
     def is_complete(self) -> bool:
         """Checks if the quiz has reached its specified number of questions."""
@@ -48,23 +94,30 @@ class QuizSession:
 
     def is_timed_out(self, timeout_seconds: int) -> bool:
         """Checks if the quiz session has timed out due to inactivity."""
-        return (time.time() - self.last_activity_time) > timeout_seconds
+        return (time.monotonic() - self.last_activity_time) > timeout_seconds
 
 def get_quiz_session(channel_id: int):
     """
     Retrieves an active quiz session for a given channel ID.
-    Updates the session's last activity time upon retrieval.
+    Looking a session up does not count as activity; activity is recorded when a
+    question is set or cleared, i.e. once an answer has actually been processed.
     """
-    session = active_quiz_sessions.get(channel_id)
-    if session:
-        session.last_activity_time = time.time()
-    return session
+    return active_quiz_sessions.get(channel_id)
+
+def get_channel_lock(channel_id: int) -> asyncio.Lock:
+    """
+    Returns the lock used to serialize quiz updates in a channel.
+    Locks are created along with the channel's session; a channel without one gets a
+    fresh lock that isn't stored, so lookups for channels with no quiz leave nothing behind.
+    """
+    return channel_locks.get(channel_id) or asyncio.Lock()
 
 def set_quiz_session(channel_id: int, session: QuizSession):
     """
     Stores a new or updates an existing quiz session for a specific channel.
     """
     active_quiz_sessions[channel_id] = session
+    channel_locks.setdefault(channel_id, asyncio.Lock())
     log.debug(f"Quiz session set for channel {channel_id}. Active quiz sessions: {len(active_quiz_sessions)}")
 
 def clear_all_quiz_sessions():
@@ -72,6 +125,7 @@ def clear_all_quiz_sessions():
     Removes all active quiz sessions from every channel.
     """
     active_quiz_sessions.clear()
+    channel_locks.clear()
     log.debug("All active quiz sessions cleared.")
 
 
@@ -79,16 +133,28 @@ def clear_quiz_session(channel_id: int):
     """
     Removes a quiz session from the active sessions dictionary.
     """
+    channel_locks.pop(channel_id, None)
     if channel_id in active_quiz_sessions:
         del active_quiz_sessions[channel_id]
         log.debug(f"Quiz session cleared for channel {channel_id}. Active quiz sessions: {len(active_quiz_sessions)}")
 
+def pop_quiz_session(channel_id: int):
+    """
+    Removes and returns the quiz session for a channel in a single lookup.
+    Returns None if there is no active session.
+    """
+    channel_locks.pop(channel_id, None)
+    session = active_quiz_sessions.pop(channel_id, None)
+    if session:
+        log.debug(f"Quiz session cleared for channel {channel_id}. Active quiz sessions: {len(active_quiz_sessions)}")
+    return session
+
 def get_timed_out_quiz_sessions(timeout_seconds: int) -> list:
     """
     Identifies and returns a list of quiz sessions that have exceeded the inactivity timeout.
     """
     timed_out_sessions = []
-    current_time = time.time()
+    current_time = time.monotonic()
     for channel_id, session in active_quiz_sessions.items():
         if (current_time - session.last_activity_time) > timeout_seconds:
             timed_out_sessions.append((channel_id, session)) # Return both ID and session object
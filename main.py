@@ -55,14 +55,14 @@ class CustomHelpCommand(commands.DefaultHelpCommand):
                 continue # Skip if no visible commands in this cog
 
             cog_name = getattr(cog, "qualified_name", "No Category")
-            commands_text = ""
+            command_lines = []
             for command in filtered_commands:
                 # Use command.brief for a short description, fallback to the first line of command.help
                 command_description = command.brief or (command.help.split('\n')[0] if command.help else 'No description provided.')
-                commands_text += f"`{self.context.clean_prefix}{command.qualified_name}` - {command_description}\n"
+                command_lines.append(f"`{self.context.clean_prefix}{command.qualified_name}` - {command_description}")
 
-            if commands_text:
-                embed.add_field(name=f"{cog_name} Commands", value=commands_text.strip(), inline=False)
+            if command_lines:
+                embed.add_field(name=f"{cog_name} Commands", value="\n".join(command_lines).strip(), inline=False)
         
         embed.set_footer(text=self.get_ending_note())
         await self.get_destination().send(embed=embed)
@@ -89,13 +89,13 @@ class CustomHelpCommand(commands.DefaultHelpCommand):
         if group.aliases:
             embed.add_field(name="Aliases", value=", ".join(f"`{self.context.clean_prefix}{a}`" for a in group.aliases), inline=False)
         
-        commands_text = ""
         commands_list = await self.filter_commands(group.commands, sort=True)
         if commands_list:
+            command_lines = []
             for command in commands_list:
                 command_description = command.brief or (command.help.split('\n')[0] if command.help else 'No description.')
-                commands_text += f"`{self.context.clean_prefix}{command.qualified_name}` - {command_description}\n"
-            embed.add_field(name="Subcommands:", value=commands_text.strip(), inline=False)
+                command_lines.append(f"`{self.context.clean_prefix}{command.qualified_name}` - {command_description}")
+            embed.add_field(name="Subcommands:", value="\n".join(command_lines).strip(), inline=False)
             
         embed.set_footer(text=self.get_ending_note())
         await self.get_destination().send(embed=embed)
@@ -185,8 +185,9 @@ async def cleanup_quiz_sessions():
             except Exception as e:
                 log.error(f"Error sending timeout message to channel {channel_id}: {e}", exc_info=True)
         
-        # Clear the session from active memory
+        # Clear the session from active memory and write any answers it was still holding
         quiz_sessions.clear_quiz_session(channel_id)
+        await database.record_answers_bulk(session.take_pending_answers())
 
 @cleanup_quiz_sessions.before_loop
 async def before_cleanup_quiz_sessions():
@@ -228,6 +229,11 @@ async def on_command_error(ctx, error):
         await ctx.send("You don't have permission to use this command.")
         log.warning(f"Unauthorized access attempt by {ctx.author.id} to {ctx.command.qualified_name}")
     
+    elif isinstance(error, commands.MissingPermissions):
+        # Raised by the administrator permission checks on admin-only commands
+        await ctx.send("You do not have administrative permissions to use this command.")
+        log.warning(f"Unauthorized admin command attempt by {ctx.author.id} ({ctx.author.name}): {ctx.command.qualified_name}.")
+    
     elif isinstance(error, commands.CheckFailure):
         # Handles general check failures (e.g., custom decorators, role checks)
         await ctx.send(f"You don't have permission to use this command here or now.")